@@ -33,25 +33,37 @@ Author: William Dickson
 ------------------------------------------------------------------------
 """
 import serial
-import struct
 import sys
 import time
+import BAI_cache
+import BAI_catalog
 import BAI_data
+import BAI_frame
+import BAI_shadow
 
 # Constants
 DFLT_PORT = '/dev/ttyS0'
 DFLT_TIMEOUT = 0.5
 DFLT_BAUDRATE = 9600
 DFLT_ADDRESS = 'A'
-DFLT_WRITE_SLEEP_T = 0.05
-DFLT_WRITE_SLEEP_CNT = 20
+DFLT_WRITE_ACK_TIMEOUT = 1.0
+DFLT_PIPELINE_DEPTH = 4
 RESET_SLEEP_T = 5.0
 SAVE_SLEEP_T = 3.0
 TOGGLE_MODE_SLEEP_T = 5.0
+PROBE_TIMEOUT = 0.1
+RECOVERY_POLL_T = 0.05
 WRITE_RETURN_NCHAR = 3
 START_CHRS = [chr(3),chr(2)]
 STOP_CHRS = [chr(10)]
+START_STR = ''.join(START_CHRS)
+STOP_STR = ''.join(STOP_CHRS)
 DISPLAY_LINE = '-'*55
+COMMAND_EXECUTING_BIT = dict([(msg,b) for b,msg in BAI_data.SERIAL_POLL_LIST])['command executing']
+
+# Command frame caches, see create_cmd and create_read_cmd
+CMD_PREFIX_CACHE = {}
+READ_CMD_CACHE = {}
     
 class BAI:
 
@@ -63,11 +75,15 @@ class BAI:
                  address=DFLT_ADDRESS, 
                  port=DFLT_PORT,
                  timeout=DFLT_TIMEOUT,
-                 baudrate=DFLT_BAUDRATE
+                 baudrate=DFLT_BAUDRATE,
+                 cache=None
                  ):
         
         # Device address for daisy chaining
         self.address = address
+
+        # Optional connection cache (BAI_cache.ConnCache)
+        self.cache = cache
         
         self.comm = serial.Serial(
             port,
@@ -85,9 +101,18 @@ class BAI:
         #print 'flushing input and output buffers'
         #self.comm.flushInput()
         #self.comm.flushOutput()
+
+        # All replies are read through the framing layer
+        self.reader = BAI_frame.FrameReader(self.comm, 
+                                            start_str=START_STR, 
+                                            stop_str=STOP_STR)
         
-        self.write_sleep_t = DFLT_WRITE_SLEEP_T
-        self.write_sleep_cnt = DFLT_WRITE_SLEEP_CNT
+        self.write_ack_timeout = DFLT_WRITE_ACK_TIMEOUT
+        self.write_ack_t = None
+        self.pipeline_depth = DFLT_PIPELINE_DEPTH
+
+        # Optional shadow copy of drive parameters (see enable_shadow)
+        self.shadow = None
         
     def open(self):
         """
@@ -98,7 +123,11 @@ class BAI:
         else:
             return self.comm.open()
 
-    def get_position(self,address=None):
+    def get_position(self,address=None,strict=False):
+        """
+        Get axis position. If strict is False a bad reply prints a
+        warning and returns 0, otherwise the error is raised.
+        """
         if not address:
             address = self.address
             
@@ -107,12 +136,12 @@ class BAI:
         cmd = create_cmd(address, status_chrs,())
         self.comm.write(cmd)
 
-        # Read and parse return string
-        rtn_str = self.comm.readline()
-        rtn_str = rtn_str[len(START_CHRS)+1:-len(STOP_CHRS)]
+        # Read and parse return frame
         try:
-            pos_int = int(rtn_str)
-        except:
+            pos_int = self.__read_reply(self.reader.read_int, address)
+        except (IOError, ValueError):
+            if strict == True:
+                raise
             print 'WARNING: bad rtn_str'
             pos_int = 0
         return pos_int
@@ -121,6 +150,12 @@ class BAI:
         """
         Temporary get status function
         """
+        return status_int2dict(self.get_status_word(address))
+
+    def get_status_word(self,address=None):
+        """
+        Get raw integer status word from drive
+        """
         if not address:
             address = self.address
 
@@ -129,18 +164,8 @@ class BAI:
         cmd = create_cmd(address, status_chrs,())
         self.comm.write(cmd)
         
-        # Read and parse return string
-        rtn_str = self.comm.readline()
-        rtn_str = rtn_str[len(START_CHRS)+1:-len(STOP_CHRS)]
-        status_int = int(rtn_str)
-        status_dict = {}
-        for b,msg in BAI_data.STATUS_LIST:
-            if type(b) == list:
-                val = [bool(x & status_int) for x in b]
-            else:
-                val = bool(b & status_int)
-            status_dict[msg] = val
-        return status_dict
+        # Read and parse return frame
+        return self.__read_reply(self.reader.read_int, address)
 
     def print_status(self, address=None):
         """
@@ -156,44 +181,145 @@ class BAI:
             print ' '*(30-len(msg)),
             print '%s'%(str(status_dict[msg]),)
 
-    def read_param(self,param,address=None):
+    def read_param(self,param,address=None,refresh=False):
         """
         Temporary read parameters function
 
         Need to check limits/allowed values  before sending parameters
         """
-        # Check that param exists
-        if not BAI_data.PARAM_DICT.has_key(param):
-             raise ValueError, "unknown parameter '%s'"%(param,)
-        
-        # Creat serial command and send
-        read_chrs = BAI_data.SYS_CMD_DICT['read parameter']['cmd']
-        num = BAI_data.PARAM_DICT[param]['num']
+        return self.read_params([param],address=address,refresh=refresh)[0]
+
+    def read_params(self,param_list,address=None,refresh=False):
+        """
+        Read a list of parameters from the drive. Up to pipeline_depth
+        read commands are kept in flight at once so that the serial
+        link isn't left idle while waiting for each reply. The replies
+        are returned by the drive in the order the commands were sent.
+
+        If the shadow copy is enabled, parameters found in it are not
+        read from the drive unless refresh is True.
+
+        Returns a list of values in the same order as param_list.
+        """
+        # Check that all params exist before sending anything
+        for param in param_list:
+            if not param in BAI_catalog.CATALOG:
+                raise ValueError, "unknown parameter '%s'"%(param,)
         if not address:
             address = self.address
-        cmd = create_cmd(address, read_chrs, (num,))
-        self.comm.write(cmd)        
-
-        # Read return value
-        rtn_str = self.comm.readline()
-        rtn_str = rtn_str[3:-1]
-
-        # Convert based on type
-        param_type = BAI_data.PARAM_DICT[param]['type'] 
-        if param_type == BAI_data.BAI_INT:
-            val = int(rtn_str)
-        elif param_type == BAI_data.BAI_CHR:
-            val = int(rtn_str)
-            val = chr(val)
-        elif param_type == BAI_data.BAI_STR:
-            # Could be wrong ??
-            val = rtn_str
-        elif param_type == BAI_data.BAI_FLOAT:
-            val = float(rtn_str)
-        else:
-            val = rtn_str
+
+        if self.shadow is None:
+            return self.__read_params_drive(param_list,address)
+
+        # Read those parameters not in the shadow copy
+        val_dict = {}
+        read_list = []
+        for param in param_list:
+            found, val = self.shadow.get(address,param)
+            if found and not refresh:
+                val_dict[param] = val
+            elif not param in read_list:
+                read_list.append(param)
+        for param, val in zip(read_list,self.__read_params_drive(read_list,address)):
+            self.shadow.set(address,param,val)
+            val_dict[param] = val
+        return [val_dict[param] for param in param_list]
+
+    def __read_params_drive(self,param_list,address):
+        """
+        Pipelined read of parameters from drive
+        """
+        # Create serial commands
+        rec_list = [BAI_catalog.CATALOG[param] for param in param_list]
+        cmd_list = [create_read_cmd(address, rec.num) for rec in rec_list]
+
+        depth = max(1,self.pipeline_depth)
+        val_list = []
+        nsent = 0
+        nread = 0
+        try:
+            while len(val_list) < len(cmd_list):
+                # Top up the commands in flight
+                while nsent < len(cmd_list) and nsent - len(val_list) < depth:
+                    self.comm.write(cmd_list[nsent])
+                    nsent += 1
+
+                # Read return value for oldest outstanding command
+                rec = rec_list[len(val_list)]
+                try:
+                    rtn_str = self.reader.read_payload(address)
+                except IOError:
+                    errmsg = "serial read (timeout) - no reply for parameter '%s'"%(rec.name,)
+                    raise IOError, errmsg
+                nread += 1
+                val_list.append(rec.convert(rtn_str))
+        except:
+            self.__drain(nsent - nread)
+            raise
         
-        return val
+        return val_list
+
+    def __read_reply(self,read,*args,**kwargs):
+        """
+        Read the reply to a single command with the reader method read.
+        If the reply times out or is bad it is discarded, along with
+        the rest of it if still arriving, before the error is raised.
+        """
+        try:
+            return read(*args,**kwargs)
+        except IOError:
+            self.__drain(1)
+            raise
+        except ValueError:
+            # Reply has been read
+            self.__drain(0)
+            raise
+
+    def __drain(self,nflight):
+        """
+        Discard replies to any commands still in flight, waiting until
+        the line is quiet as they may still be arriving
+        """
+        if nflight > 0:
+            quiet_t = max(self.comm.getTimeout(), DFLT_TIMEOUT)
+            self.reader.drain(quiet_t, nframe=nflight)
+        else:
+            self.reader.clear()
+
+    def enable_shadow(self,ttl=None):
+        """
+        Keep a shadow copy of the drive's parameters. Reads are then
+        answered from the shadow copy where possible and successful
+        writes update it. If ttl is given, shadow values older than ttl
+        seconds are read from the drive again.
+        """
+        self.shadow = BAI_shadow.ParamShadow(ttl=ttl)
+
+    def disable_shadow(self):
+        """
+        Stop keeping a shadow copy of the drive's parameters
+        """
+        self.shadow = None
+
+    def refresh_shadow(self,address=None):
+        """
+        Discard shadow values for drive with given address (or all
+        drives if address is None) so that they are read again.
+        """
+        if self.shadow is not None:
+            self.shadow.invalidate(address=address)
+
+    def get_unsaved(self,address=None):
+        """
+        Returns list of (parameter, value) pairs which have been written
+        to the drive's RAM but not yet saved to flash. Requires the
+        shadow copy to be enabled.
+        """
+        if self.shadow is None:
+            raise RuntimeError, 'shadow copy not enabled'
+        if not address:
+            address = self.address
+        return self.shadow.unsaved(address)
 
     def print_param(self,address=None, verbose=False):
         """
@@ -208,9 +334,9 @@ class BAI:
             print 'BAI Parameters'
             print 
             
-        for num, param in BAI_data.NUM2PARAM_LIST:
+        val_list = self.read_params(BAI_data.PARAM_LIST,address=address)
+        for (num, param), cur_val in zip(BAI_data.NUM2PARAM_LIST,val_list):
             param_dict = BAI_data.PARAM_DICT[param]
-            cur_val = self.read_param(param,address=address)
             if verbose==False:
                 print_param_normal(num, param, cur_val)
             else:
@@ -232,53 +358,63 @@ class BAI:
         
     def write_param(self,param,val,address=None, write_ack=True):
         """
-        Write parameter function
+        Write parameter function. Returns the time taken for the write
+        acknowledgement to arrive or None if write_ack is False.
         """
         if not address:
             address = self.address
 
         # Check that param exists
-        if not BAI_data.PARAM_DICT.has_key(param):
+        try:
+            rec = BAI_catalog.CATALOG[param]
+        except KeyError:
              raise ValueError, "unknown parameter '%s'"%(param,)
 
-        val_type = BAI_data.PARAM_DICT[param]['type']
-
         # Cast and check value range
-        val = cast_val(param,val)
-        check_val(param,val)
+        val = rec.cast(val)
+        rec.check(val)
                     
         # Create and send serial command
         write_chrs = BAI_data.SYS_CMD_DICT['write parameter']['cmd']
-        num = BAI_data.PARAM_DICT[param]['num']
-        cmd = create_cmd(address, write_chrs,(num, val))
+        cmd = create_cmd(address, write_chrs,(rec.num, val))
+        if self.shadow is not None:
+            self.shadow.invalidate(address=address,param=param)
         self.comm.write(cmd)
 
         # Read acknowledgement
         if write_ack==True:
-            self.__get_write_ack()
+            ack_t = self.__get_write_ack()
+            if self.shadow is not None:
+                val = rec.convert(val)
+                self.shadow.set(address,param,val,unsaved=True)
+                if param == 'unit address':
+                    # Drive now answers to a different address
+                    self.shadow.move_address(address,val)
+            return ack_t
         
 
     def __get_write_ack(self):
         """
-        Wait for and read write acknoweledgement chrs
+        Wait for and read write acknoweledgement chrs. The read blocks on
+        the port and returns as soon as all the acknowledgement chrs have
+        arrived, or raises an IOError if they haven't arrived by the
+        write_ack_timeout deadline. Returns the time taken for the
+        acknowledgement to arrive.
         """
-        cnt = 0
-        write_rtn_flag = False
-        while cnt < self.write_sleep_cnt:
-            cnt += 1
-            nchar = self.comm.inWaiting()
-            time.sleep(self.write_sleep_t)
-            if nchar == WRITE_RETURN_NCHAR:
-                write_rtn_flag = True
-                break
-        if not write_rtn_flag:
-            errmsg = 'serial write (timeout) - too few return characters after %d trys'%(self.write_sleep_cnt,)
+        t0 = time.time()
+        try:
+            self.__read_reply(self.reader.read_chrs, WRITE_RETURN_NCHAR, timeout=self.write_ack_timeout)
+        except IOError:
+            errmsg = 'serial write (timeout) - too few return characters after %1.3f s'%(self.write_ack_timeout,)
             raise IOError, errmsg
-        self.comm.read(nchar)
+        self.write_ack_t = time.time() - t0
+        return self.write_ack_t
 
     def save_to_flash(self,address=None):
         """
-        Save parameters to flash
+        Save parameters to flash. Waits, for at most SAVE_SLEEP_T, until
+        the drive answers serial polls again. Returns the measured
+        recovery time. Raises IOError if the drive doesn't recover.
         """
         if not address:
             address = self.address
@@ -286,8 +422,11 @@ class BAI:
         save_chrs = BAI_data.SYS_CMD_DICT['save parameters']['cmd']
         cmd =create_cmd(address, save_chrs, ())
         self.comm.write(cmd)
-        self.comm.readline()
-        time.sleep(SAVE_SLEEP_T)
+        self.reader.read_line()
+        recovery_t = self.__wait_recovery(address, SAVE_SLEEP_T)
+        if self.shadow is not None:
+            self.shadow.mark_saved(address)
+        return recovery_t
     
     def get_nondefault(self,address=None):
         """
@@ -296,9 +435,9 @@ class BAI:
         (parameter name, current value, default value)
         """
         nondefault = [] 
-        for num, param in BAI_data.NUM2PARAM_LIST:
+        val_list = self.read_params(BAI_data.PARAM_LIST,address=address)
+        for (num, param), current_val in zip(BAI_data.NUM2PARAM_LIST,val_list):
             default_val = BAI_data.PARAM_DICT[param]['default']
-            current_val = self.read_param(param,address=address)
             if current_val != default_val:
                 nondefault.append((num,param,current_val,default_val))
         return nondefault
@@ -348,12 +487,18 @@ class BAI:
             default_baudrate = BAI_data.PARAM_DICT['baud rate']['default']
             self.comm.setBaudrate(default_baudrate)
             # Need to toggle back to remote mode
+            self.__update_cache(baudrate=default_baudrate,
+                                address=BAI_data.PARAM_DICT['unit address']['default'],
+                                mode=BAI_cache.MODE_LOCAL)
         if toggle==True:
             self.toggle_mode()
             
-    def reset(self,address=None):
+    def reset(self,address=None,wait=True):
         """
-        Reset BAI unit
+        Reset BAI unit. If wait is True, waits for at most RESET_SLEEP_T
+        until the drive answers serial polls again and returns the
+        measured recovery time, raising IOError if it doesn't recover.
+        Otherwise returns None immediately.
         """
         if address == None:
             address = self.address
@@ -361,18 +506,38 @@ class BAI:
         reset_chrs = BAI_data.SYS_CMD_DICT['reset unit']['cmd']
         cmd = create_cmd(address, reset_chrs, ())
         self.comm.write(cmd)
-        self.comm.readline()
-        time.sleep(RESET_SLEEP_T)
+        self.reader.read_line()
+
+        # Reset reloads parameters from flash
+        if self.shadow is not None:
+            self.shadow.invalidate(address=address)
+
+        if wait == True:
+            return self.__wait_recovery(address, RESET_SLEEP_T)
 
     def toggle_mode(self):
         """
-        Toggle unit between local and remote mode
+        Toggle unit between local and remote mode. Waits, for at most
+        TOGGLE_MODE_SLEEP_T, until the drive answers serial polls again
+        and returns the measured recovery time. A drive in local mode
+        doesn't answer, so if there is no answer by then the drive is
+        taken to be in local mode and None is returned.
         """
         toggle_chrs = BAI_data.SYS_CMD_DICT['toggle mode']['cmd']
         cmd = create_cmd(None, toggle_chrs, ())
         self.comm.write(cmd)
-        self.comm.readline()
-        time.sleep(TOGGLE_MODE_SLEEP_T)
+        self.reader.read_line()
+        try:
+            recovery_t = self.__wait_recovery(self.address, TOGGLE_MODE_SLEEP_T)
+        except IOError:
+            recovery_t = None
+
+        # Record mode in connection cache
+        if recovery_t is None:
+            self.__update_cache(mode=BAI_cache.MODE_LOCAL)
+        else:
+            self.__update_cache(mode=BAI_cache.MODE_REMOTE)
+        return recovery_t
 
     def set_baudrate(self, baudrate, address=None, save_and_reset=True, verbose=False):
         """
@@ -381,6 +546,10 @@ class BAI:
         device. The baudrate of the serial port is then set to the new
         value. This is done to ensure that serial communications
         function at the new baudrate.
+
+        The drive is polled at the new baud rate straight after the
+        reset. Returns the total save and reset recovery time, or None
+        if save_and_reset is False.
         """
         allowed  = BAI_data.PARAM_DICT['baud rate']['allowed']
         if not baudrate in allowed:
@@ -393,42 +562,38 @@ class BAI:
             if verbose == True:
                 print 'Saving to flash ...',
                 sys.stdout.flush()
-            self.save_to_flash()
+            save_t = self.save_to_flash(address=address)
             if verbose == True:
                 print 'done'
                 print 'Reseting ...',
                 sys.stdout.flush()
-            self.reset()
+            self.reset(address=address,wait=False)
+            self.comm.setBaudrate(baudrate)
+            reset_t = self.__wait_recovery(address, RESET_SLEEP_T)
             if verbose == True:
                 print 'done'
-            self.comm.setBaudrate(baudrate)
+            self.__update_cache(baudrate=baudrate)
+            return save_t + reset_t
 
-    def param_from_file(self, filename, address=None, verbose=False):
+    def param_from_file(self, filename, address=None, verbose=False, sync=False):
         """
         Read all parameters from input file and write them to drive.
+        If sync is True only those parameters whose values differ from
+        the drive's current values are written, see sync_from_file.
         
         Returns baudrate_flag = True if baudrate has changes
         """
+        if sync == True:
+            baudrate_changed, written, skipped = self.sync_from_file(filename,
+                                                                     address=address,
+                                                                     verbose=verbose)
+            return baudrate_changed
+
         if address == None:
             address = self.address
         
-        # Read parameters from file
-        fid = open(filename,"r")
-        param_list = []
-        for i, line in enumerate(fid.readlines()):
-            line_split = line.split()
-            if len(line_split) != 3:
-                print "ERROR: incorrect data format on line %d"%(i,)
-                sys.exit(1)
-            param = line_split[1].replace('_',' ')
-            value = line_split[2]
-            param_list.append((param,value))
-        fid.close()
-
-        # Check parameters - before sending
-        for param, value in param_list:
-            value = cast_val(param,value)
-            check_val(param,value)
+        # Read and check parameters - before sending
+        param_list = read_param_file(filename)
 
         # Write parameters to drice
         baudrate_changed = False
@@ -449,6 +614,70 @@ class BAI:
         
         return baudrate_changed
 
+    def diff_param_file(self, filename, address=None):
+        """
+        Compare parameters in input file with the drive's current
+        values, which are read in bulk from the drive and not from the
+        shadow copy as it may be stale. Returns two lists, changed and
+        unchanged, of tuples (number, parameter, current value, file
+        value) in file order.
+        """
+        if address == None:
+            address = self.address
+
+        param_list = read_param_file(filename)
+        read_list = []
+        for param, value in param_list:
+            if not param in read_list:
+                read_list.append(param)
+        current_dict = dict(zip(read_list, self.read_params(read_list, address=address, refresh=True)))
+
+        changed = []
+        unchanged = []
+        for param, value in param_list:
+            num = BAI_data.PARAM_DICT[param]['num']
+            value = convert_val(param, cast_val(param,value))
+            current = current_dict[param]
+            if value == current:
+                unchanged.append((num, param, current, value))
+            else:
+                changed.append((num, param, current, value))
+        return changed, unchanged
+
+    def sync_from_file(self, filename, address=None, verbose=False):
+        """
+        Bring drive's parameters into line with those in the input file
+        by writing only the parameters which differ. 
+
+        Returns (baudrate_changed, written, skipped) where written and
+        skipped are lists of (number, parameter, current value, file
+        value) tuples for the parameters written and left unchanged.
+        """
+        if address == None:
+            address = self.address
+
+        changed, unchanged = self.diff_param_file(filename, address=address)
+        if verbose == True:
+            for num, param, current, value in unchanged:
+                print 'skipping:',
+                print_param_normal(num,param,value)
+
+        # Write unit address last as the drive stops answering to the
+        # old address as soon as it is changed
+        write_list = [x for x in changed if x[1] != 'unit address']
+        write_list.extend([x for x in changed if x[1] == 'unit address'])
+
+        baudrate_changed = False
+        for num, param, current, value in write_list:
+            if verbose == True:
+                print 'writing: ',
+                print_param_normal(num,param,value)
+            if param == 'baud rate':
+                baudrate_changed = True
+            self.write_param(param,value, address=address)
+
+        return baudrate_changed, changed, unchanged
+
     def param_to_file(self, filename, address=None, verbose=False):
         """
         Read all parameters from drive and write them to output file.
@@ -456,10 +685,9 @@ class BAI:
         if address == None:
             address = self.address
 
+        val_list = self.read_params(BAI_data.PARAM_LIST,address=address)
         fid = open(filename,"w")        
-        for num, param in BAI_data.NUM2PARAM_LIST:
-            param_dict = BAI_data.PARAM_DICT[param]
-            cur_val = self.read_param(param,address=address)
+        for (num, param), cur_val in zip(BAI_data.NUM2PARAM_LIST,val_list):
             write_param_to_file(fid,num,param,cur_val)
 
             if verbose == True:
@@ -479,7 +707,139 @@ class BAI:
         
         fid.close()
 
-    def find_baudrate(self,address=None, verbose=False):
+    def serial_poll(self,address=None,timeout=PROBE_TIMEOUT):
+        """
+        Get serial poll flags from drive. The serial poll (Q) reply is
+        the low byte of the status word, see BAI_data.SERIAL_POLL_LIST,
+        and is much shorter than the full status reply. Returns a
+        dictionary of flags keyed by the SERIAL_POLL_LIST messages.
+        """
+        return serial_poll_int2dict(self.get_serial_poll_word(address,timeout))
+
+    def get_serial_poll_word(self,address=None,timeout=PROBE_TIMEOUT):
+        """
+        Send a serial poll command and return the serial poll byte as
+        an integer. The wait for the reply is timeout plus the wire
+        time of the frames at the current baud rate. Raises IOError if
+        there is no reply and ValueError if the reply is garbled.
+        """
+        if not address:
+            address = self.address
+        cmd = create_serial_poll_cmd(address)
+        old_timeout = self.comm.getTimeout()
+        self.reader.clear()
+        self.comm.setTimeout(serial_poll_timeout(cmd, self.comm.getBaudrate(), timeout))
+        try:
+            self.comm.write(cmd)
+            rtn_str = self.reader.read_line()
+        finally:
+            self.comm.setTimeout(old_timeout)
+        return parse_serial_poll(rtn_str, address)
+
+    def probe(self,address=None,timeout=PROBE_TIMEOUT):
+        """
+        Check that the drive is talking at the port's current baud rate
+        using a single serial poll. Returns True if the reply is good
+        and False otherwise.
+        """
+        try:
+            self.get_serial_poll_word(address=address,timeout=timeout)
+        except (IOError, ValueError):
+            return False
+        return True
+
+    def wait_ready(self,address=None,timeout=RESET_SLEEP_T,period=0.0,probe_timeout=PROBE_TIMEOUT):
+        """
+        Serial poll drive until it answers and isn't executing a
+        command, waiting period seconds between polls. Returns the
+        time waited. Raises IOError if the drive isn't ready within
+        timeout seconds.
+        """
+        start_t = time.time()
+        while True:
+            try:
+                poll_int = self.get_serial_poll_word(address=address,timeout=probe_timeout)
+                if is_ready(poll_int):
+                    return time.time() - start_t
+            except (IOError, ValueError):
+                pass
+            if time.time() - start_t > timeout:
+                raise IOError, 'drive not ready after %1.1f s'%(timeout,)
+            if period > 0:
+                time.sleep(period)
+
+    def find_baudrate(self,address=None, verbose=False, guess=None, thorough=False):
+        """
+        Try to find baudrate. Each baud rate is probed with a single
+        serial poll command, starting with the most likely rates: those
+        given in the guess list, the port's current baud rate and then
+        the drive's default baud rate. Garbled or missing replies fail
+        fast and the next rate is tried. The winning rate is confirmed
+        by a second serial poll. The drive's baud rate parameter isn't
+        used as it may hold a new rate which only applies after a reset,
+        see get_stored_baudrate.
+
+        If thorough is True the older (slow) full parameter sweep is
+        used instead, see find_baudrate_thorough.
+
+        Returns (True,baudrate) on success and (False,0) on failure.
+        """
+        if thorough == True:
+            return self.find_baudrate_thorough(address=address, verbose=verbose)
+
+        # Order baud rates - most likely first
+        baudrates = []
+        if guess:
+            baudrates.extend(guess)
+        if self.cache is not None:
+            entry = self.cache.get(self.comm.port)
+            if entry is not None and entry['baudrate']:
+                baudrates.append(entry['baudrate'])
+        baudrates.append(self.comm.getBaudrate())
+        baudrates.append(BAI_data.PARAM_DICT['baud rate']['default'])
+        baudrates.extend(allowed_baudrates())
+        baudrates = [b for i,b in enumerate(baudrates) 
+                     if b in allowed_baudrates() and not b in baudrates[:i]]
+        
+        if verbose == True:
+            print '----------------------------------------'
+
+        for b in baudrates:
+            if verbose == True:
+                trying_str = 'trying %d'%(b,) 
+                print trying_str,
+                print ' '*(12 - len(trying_str)),
+                sys.stdout.flush()
+
+            self.comm.setBaudrate(b)
+            test = self.probe(address=address)
+            if test == True:
+                # Confirm baud rate with a second good reply
+                test = self.probe(address=address)
+
+            if test == True:
+                if verbose == True:
+                    print 'success'
+                self.__update_cache(baudrate=b, 
+                                    address=address or self.address,
+                                    mode=BAI_cache.MODE_REMOTE)
+                return True, b
+            if verbose == True:
+                print 'failed'
+        return False, 0
+
+    def get_stored_baudrate(self,address=None):
+        """
+        Read the drive's baud rate parameter. This differs from the line
+        baud rate if a new rate has been written but the drive hasn't
+        been reset. Returns None if it can't be read.
+        """
+        try:
+            return self.read_param('baud rate', address=address, refresh=True)
+        except Exception:
+            return None
+
+    def find_baudrate_thorough(self,address=None, verbose=False):
         """
         Try to find baudrate. This is a simple heuristic I came up
         with by trial and error. It is a bit kludgey, butt seems to
@@ -515,7 +875,7 @@ class BAI:
                 # I'm not really sure why doing this help, but it
                 # does.
                 try:
-                    val = self.read_param('KP', address=address)
+                    val = self.read_param('KP', address=address, refresh=True)
                 except:
                     pass
                 try:
@@ -525,8 +885,7 @@ class BAI:
                 
                 # Try reading every parameter - if this works then
                 # this is our buadrate
-                for num, param in BAI_data.NUM2PARAM_LIST:
-                    val = self.read_param(param,address=address)
+                val_list = self.read_params(BAI_data.PARAM_LIST,address=address,refresh=True)
 
                 # If we made it this far then this is our baudrate
                 test = True
@@ -548,6 +907,51 @@ class BAI:
             return test, 0
 
     
+    def apply_cache(self):
+        """
+        Set the port's baud rate from the connection cache. The cached
+        baud rate is checked with a single probe of the cached address,
+        the drive last found on the port, but the device address is
+        left unchanged so that commands are never redirected to another
+        drive on a daisy chain. If the probe fails the cache entry is
+        invalidated and the original baud rate is restored.
+
+        Returns True if the cached baud rate was applied.
+        """
+        if self.cache is None:
+            return False
+        entry = self.cache.get(self.comm.port)
+        if entry is None or not entry['baudrate']:
+            return False
+
+        old_baudrate = self.comm.getBaudrate()
+        self.comm.setBaudrate(entry['baudrate'])
+        if self.probe(address=entry['address'] or self.address):
+            return True
+        self.comm.setBaudrate(old_baudrate)
+        self.cache.invalidate(self.comm.port)
+        return False
+
+    def __wait_recovery(self,address,max_t):
+        """
+        Wait, for at most max_t, for drive to answer serial polls after
+        a save, reset or mode toggle. Returns the time waited. Raises
+        IOError if the drive hasn't recovered by then.
+        """
+        return self.wait_ready(address=address,timeout=max_t,period=RECOVERY_POLL_T)
+
+    def __update_cache(self, **kwargs):
+        """
+        Update connection cache entry for this port
+        """
+        if self.cache is None:
+            return
+        try:
+            self.cache.update(self.comm.port, **kwargs)
+        except (IOError, OSError):
+            # Cache is only an optimization - don't fail because of it
+            pass
+
     def close(self):
         self.comm.close()
         
@@ -567,6 +971,97 @@ def write_param_to_file(fid,num,param,val):
     fid.write(' '*(25 - len(prm_str)))
     fid.write(val_str)
 
+def convert_val(param, rtn_str):
+    """
+    Convert value string returned by the drive to the correct type for
+    the given parameter.
+    """
+    return BAI_catalog.CATALOG[param].convert(rtn_str)
+
+def status_int2dict(status_int):
+    """
+    Convert integer status word returned by the drive to dictionary of
+    status values keyed by the messages in BAI_data.STATUS_LIST.
+    """
+    status_dict = {}
+    for b,msg in BAI_data.STATUS_LIST:
+        if type(b) == list:
+            val = [bool(x & status_int) for x in b]
+        else:
+            val = bool(b & status_int)
+        status_dict[msg] = val
+    return status_dict
+
+def serial_poll_int2dict(poll_int):
+    """
+    Convert serial poll byte returned by the drive to dictionary of
+    flags keyed by the messages in BAI_data.SERIAL_POLL_LIST.
+    """
+    poll_dict = {}
+    for b,msg in BAI_data.SERIAL_POLL_LIST:
+        poll_dict[msg] = bool(b & poll_int)
+    return poll_dict
+
+def create_serial_poll_cmd(address):
+    poll_chrs = BAI_data.SYS_CMD_DICT['serial poll']['cmd']
+    return create_cmd(address, poll_chrs, ())
+
+def serial_poll_timeout(cmd, baudrate, timeout=PROBE_TIMEOUT):
+    """
+    Returns time to wait for serial poll reply - timeout plus the wire
+    time of the command and reply frames.
+    """
+    nchar = len(cmd) + len(START_CHRS) + 1 + len('255') + len(STOP_CHRS)
+    return timeout + 10.0*nchar/baudrate
+
+def parse_serial_poll(rtn_str, address):
+    """
+    Check framing and value of serial poll reply and return the serial
+    poll byte. Raises IOError if there is no reply and ValueError if it
+    is garbled.
+    """
+    if not rtn_str:
+        raise IOError, 'serial read (timeout) - no serial poll reply'
+    if not check_frame(rtn_str, address):
+        raise ValueError, 'bad serial poll reply'
+    poll_int = int(rtn_str[len(START_CHRS)+1:-len(STOP_CHRS)])
+    if not 0 <= poll_int <= 0xff:
+        raise ValueError, 'serial poll value out of range'
+    return poll_int
+
+def is_ready(poll_int):
+    """
+    Returns True if serial poll byte shows the drive isn't executing a
+    command
+    """
+    return not poll_int & COMMAND_EXECUTING_BIT
+
+def read_param_file(filename):
+    """
+    Read parameters file, as written by param_to_file, and check the
+    values. Returns list of (parameter, value string) tuples in file
+    order.
+    """
+    fid = open(filename,"r")
+    param_list = []
+    for i, line in enumerate(fid.readlines()):
+        line_split = line.split()
+        if len(line_split) != 3:
+            fid.close()
+            raise ValueError, "incorrect data format on line %d"%(i,)
+        param = line_split[1].replace('_',' ')
+        value = line_split[2]
+        param_list.append((param,value))
+    fid.close()
+
+    for param, value in param_list:
+        try:
+            rec = BAI_catalog.CATALOG[param]
+        except KeyError:
+            raise ValueError, "unknown parameter '%s'"%(param,)
+        rec.check(rec.cast(value))
+    return param_list
+
 def allowed_baudrates():
     """
     Return tuple of allowed baud rates
@@ -578,65 +1073,73 @@ def cast_val(param, val):
     Cast value to correct type for given parameter. If cast fails the 
     appropriate exception is called.
     """
-    val_type = BAI_data.PARAM_DICT[param]['type']
-    if val_type == BAI_data.BAI_INT:
-        val = int(val)
-    elif val_type == BAI_data.BAI_FLOAT:
-        val = float(val)
-    elif val_type == BAI_data.BAI_STR:
-        val = str(val)
-    elif val_type == BAI_data.BAI_CHR:
-        val = str(ord(val))
-    else:
-        raise ValueError, "uknown value type"
-    return val
+    return BAI_catalog.CATALOG[param].cast(val)
 
 def check_val(param, val):
     """
     Check that value is in the correct range for given parameter.
     Raises an exception if it is not.
     """
-    val_type = BAI_data.PARAM_DICT[param]['type']
-
-    # check range if value is a number
-    if val_type in (BAI_data.BAI_INT,BAI_data.BAI_FLOAT):
-        if val <  BAI_data.PARAM_DICT[param]['min']:
-            raise ValueError, 'numerical parameter < minimum allowed value'
-        if val > BAI_data.PARAM_DICT[param]['max']:
-            raise ValueError, 'numerical parameter > maximum allowed value'
+    BAI_catalog.CATALOG[param].check(val)
 
-    # Check range is value is a character
-    if val_type == BAI_data.BAI_CHR:
-        if int(val) < ord(BAI_data.PARAM_DICT[param]['min']):
-            raise ValueError, 'character parameter < minimum allowed value'
-        if int(val) > ord(BAI_data.PARAM_DICT[param]['max']):
-            raise ValueError, 'character parameter > maximum allowed value'
-    return
+def check_frame(rtn_str, address):
+    """
+    Check that return string is framed as a reply from drive with the
+    given address, i.e. start chrs + address + value + stop chrs.
+    """
+    start_str = ''.join(START_CHRS) + address
+    stop_str = ''.join(STOP_CHRS)
+    if len(rtn_str) <= len(start_str) + len(stop_str):
+        return False
+    return rtn_str.startswith(start_str) and rtn_str.endswith(stop_str)
 
 def num2param(num):
     """
     Convert parameter number to parameter name
     """
-    num2param_dict = dict(BAI_data.NUM2PARAM_LIST)
-    return num2param_dict[num]
+    return BAI_catalog.CATALOG.by_num[num].name
     
 def create_cmd(address, cmd_chrs, arg_list= ()):
     """
-    Create seraial command
+    Create seraial command. The fixed part of the command, start chrs +
+    address + command chrs, is built once for each (address, command)
+    pair and cached so that only the arguments are encoded per call.
+    """
+    try:
+        prefix = CMD_PREFIX_CACHE[(address, cmd_chrs)]
+    except KeyError:
+        prefix = create_cmd_prefix(address, cmd_chrs)
+    if arg_list:
+        return prefix + ''.join([' %s'%(arg,) for arg in arg_list]) + STOP_STR
+    else:
+        return prefix + STOP_STR
+
+def create_cmd_prefix(address, cmd_chrs):
+    """
+    Create fixed prefix, start chrs + address + command chrs, of serial 
+    command and add it to the prefix cache.
     """
-    cmd_list = []
-    cmd_list.extend(START_CHRS)
     if address:
         if not len(address) == 1:
             raise ValueError, 'address must have length = 1'
-        cmd_list.append(address)
-    cmd_list.extend([c for c in cmd_chrs])
-    for arg in arg_list:
-        cmd_list.append(' ')
-        cmd_list.extend([c for c in str(arg)])
-    cmd_list.extend(STOP_CHRS)
-    cmd = struct.pack('c'*len(cmd_list),*cmd_list)
-    return cmd
+        prefix = START_STR + address + cmd_chrs
+    else:
+        prefix = START_STR + cmd_chrs
+    CMD_PREFIX_CACHE[(address, cmd_chrs)] = prefix
+    return prefix
+
+def create_read_cmd(address, num):
+    """
+    Create read parameter command for parameter number, num. The
+    complete commands are cached.
+    """
+    try:
+        return READ_CMD_CACHE[(address, num)]
+    except KeyError:
+        read_chrs = BAI_data.SYS_CMD_DICT['read parameter']['cmd']
+        cmd = create_cmd(address, read_chrs, (num,))
+        READ_CMD_CACHE[(address, num)] = cmd
+        return cmd
 
 def print_param_verbose(num,param,param_dict,cur_val):
     """
@@ -644,6 +1147,10 @@ def print_param_verbose(num,param,param_dict,cur_val):
     documentation, current and default values.
     """
     n = 10
+
+    # Documentation keys are loaded on demand - include them
+    param_dict = dict(param_dict)
+    param_dict.update(BAI_data.get_param_doc(param))
     
     print '-'*70
     print param_dict['doc_str']
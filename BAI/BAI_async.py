@@ -0,0 +1,492 @@
+"""
+-----------------------------------------------------------------------
+pyBAI
+Copyright (C) William Dickson, 2008.
+
+wbd@caltech.edu
+www.willdickson.com
+
+Released under the LGPL Licence, Version 3
+
+This file is part of pyBAI.
+
+pyBAI is free software: you can redistribute it and/or modify it
+under the terms of the GNU Lesser General Public License as published
+by the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+pyBAI is distributed in the hope that it will be useful, but
+WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public
+License along with pyBAI.  If not, see <http://www.gnu.org/licenses/>.
+
+------------------------------------------------------------------------
+
+Purpose: Provides non-blocking RS232 communications with Aerotech
+BA-Intellidrive PID servo controllers. A single AsyncLoop can drive
+many AsyncBAI devices, each on its own serial port, from one thread
+without blocking on any of them.
+
+Example:
+
+  loop = AsyncLoop()
+  dev0 = AsyncBAI(port='/dev/ttyS0', loop=loop)
+  dev1 = AsyncBAI(port='/dev/ttyS1', loop=loop)
+  req0 = dev0.read_param('KP')
+  req1 = dev1.get_status()
+  loop.run_until_complete([req0, req1])
+  print req0.result(), req1.result()
+
+Author: William Dickson
+
+------------------------------------------------------------------------
+"""
+import collections
+import select
+import serial
+import time
+import BAI
+import BAI_catalog
+import BAI_data
+import BAI_frame
+
+class AsyncRequest:
+
+    """
+    Pending request returned by the AsyncBAI methods. The request is
+    complete once done is True, after which result() returns the value
+    or raises the error encountered.
+    """
+
+    def __init__(self):
+        self.done = False
+        self.value = None
+        self.error = None
+        self.callbacks = []
+
+    def add_callback(self,func):
+        """
+        Add function to be called, with the request as its argument,
+        when the request completes.
+        """
+        if self.done:
+            func(self)
+        else:
+            self.callbacks.append(func)
+
+    def set_result(self,value):
+        self.value = value
+        self.__complete()
+
+    def set_error(self,error):
+        self.error = error
+        self.__complete()
+
+    def result(self):
+        """
+        Return value of completed request
+        """
+        if not self.done:
+            raise RuntimeError, 'request not complete'
+        if self.error is not None:
+            raise self.error
+        return self.value
+
+    def __complete(self):
+        self.done = True
+        for func in self.callbacks:
+            func(self)
+        self.callbacks = []
+
+class AsyncBAI:
+
+    """
+    Non-blocking RS232 communications with Aerotech BA-Intellidrive PID
+    servo controllers. Mirrors the BAI class API except that each
+    method returns an AsyncRequest immediately. Requests on the same
+    device are carried out in the order they were made.
+    """
+
+    def __init__(self,
+                 address=BAI.DFLT_ADDRESS,
+                 port=BAI.DFLT_PORT,
+                 timeout=BAI.DFLT_TIMEOUT,
+                 baudrate=BAI.DFLT_BAUDRATE,
+                 loop=None
+                 ):
+
+        # Device address for daisy chaining
+        self.address = address
+        self.timeout = timeout
+        self.write_ack_timeout = BAI.DFLT_WRITE_ACK_TIMEOUT
+
+        # Zero timeout - reads return immediately with what is available
+        self.comm = serial.Serial(
+            port,
+            timeout = 0,
+            baudrate = baudrate,
+            parity = serial.PARITY_NONE,
+            stopbits = serial.STOPBITS_ONE,
+            xonxoff = 0,
+            rtscts = 0
+            )
+
+        if not self.comm.isOpen():
+            raise IOError , 'unable to open port'
+
+        # Replies are read through the same framing layer as BAI, fed
+        # without blocking as chrs arrive
+        self.reader = BAI_frame.FrameReader(self.comm,
+                                            start_str=BAI.START_STR,
+                                            stop_str=BAI.STOP_STR)
+
+        self.op_queue = collections.deque()
+        self.op = None
+
+        self.loop = loop
+        if self.loop is not None:
+            self.loop.add(self)
+
+    def fileno(self):
+        return self.comm.fileno()
+
+    def read_param(self,param,address=None):
+        """
+        Read parameter from drive
+        """
+        if not param in BAI_catalog.CATALOG:
+            raise ValueError, "unknown parameter '%s'"%(param,)
+        rec = BAI_catalog.CATALOG[param]
+        address = self.__address(address)
+        cmd = BAI.create_read_cmd(address, rec.num)
+        return self.__submit(cmd, address=address, parse=rec.convert)
+
+    def write_param(self,param,val,address=None):
+        """
+        Write parameter to drive. The request's result is the time
+        taken for the write acknowledgement to arrive.
+        """
+        if not param in BAI_catalog.CATALOG:
+            raise ValueError, "unknown parameter '%s'"%(param,)
+        rec = BAI_catalog.CATALOG[param]
+        val = rec.cast(val)
+        rec.check(val)
+        write_chrs = BAI_data.SYS_CMD_DICT['write parameter']['cmd']
+        cmd = BAI.create_cmd(self.__address(address), write_chrs, (rec.num,val))
+        return self.__submit(cmd, kind='chrs', timeout=self.write_ack_timeout)
+
+    def get_status(self,address=None):
+        """
+        Get status dictionary from drive
+        """
+        address = self.__address(address)
+        status_chrs = BAI_data.SYS_CMD_DICT['print status']['cmd']
+        cmd = BAI.create_cmd(address, status_chrs, ())
+        parse = lambda rtn_str: BAI.status_int2dict(int(rtn_str))
+        return self.__submit(cmd, address=address, parse=parse)
+
+    def get_position(self,address=None):
+        """
+        Get axis position from drive
+        """
+        address = self.__address(address)
+        pos_chrs = BAI_data.SYS_CMD_DICT['print axis position']['cmd']
+        cmd = BAI.create_cmd(address, pos_chrs, ())
+        return self.__submit(cmd, address=address, parse=int)
+
+    def save_to_flash(self,address=None):
+        """
+        Save parameters to flash. As for BAI.save_to_flash the drive is
+        serial polled, for at most SAVE_SLEEP_T, until it is ready again
+        and further requests to this device are held until then. The
+        request's result is the recovery time.
+        """
+        address = self.__address(address)
+        save_chrs = BAI_data.SYS_CMD_DICT['save parameters']['cmd']
+        cmd = BAI.create_cmd(address, save_chrs, ())
+        return self.__submit(cmd, kind='line', address=address, recover_t=BAI.SAVE_SLEEP_T)
+
+    def reset(self,address=None):
+        """
+        Reset BAI unit. The drive is serial polled, for at most
+        RESET_SLEEP_T, until it is ready again as for BAI.reset. The
+        request's result is the recovery time.
+        """
+        address = self.__address(address)
+        reset_chrs = BAI_data.SYS_CMD_DICT['reset unit']['cmd']
+        cmd = BAI.create_cmd(address, reset_chrs, ())
+        return self.__submit(cmd, kind='line', address=address, recover_t=BAI.RESET_SLEEP_T)
+
+    def close(self):
+        if self.loop is not None:
+            self.loop.remove(self)
+        self.comm.close()
+
+    def deadline(self):
+        """
+        Returns time by which the current operation must next be
+        serviced or None if the device is idle.
+        """
+        if self.op is None:
+            return None
+        return self.op['deadline']
+
+    def handle_read(self):
+        """
+        Read available chrs from port and advance current operation.
+        Called by the loop when the port is readable.
+        """
+        nchar = self.reader.read_available()
+        op = self.op
+        if op is not None and op['state'] == 'drain' and nchar > 0:
+            # Line not yet quiet
+            op['deadline'] = time.time() + self.__quiet_t()
+        self.__advance()
+
+    def handle_timer(self,now):
+        """
+        Check the current operation's deadline. Called by the loop.
+        """
+        op = self.op
+        if op is None or now < op['deadline']:
+            return
+        if op['state'] == 'poll_wait':
+            self.__send_poll()
+        elif op['state'] == 'poll':
+            # No serial poll reply
+            self.reader.clear()
+            self.__poll_failed()
+        elif op['state'] == 'drain':
+            # Line quiet - late reply lost
+            self.reader.clear()
+            self.__start_next()
+        else:
+            # The reply may still arrive, it is discarded so that it
+            # isn't taken as the reply to the next operation
+            self.__fail(IOError('serial read (timeout) - no reply from drive'), nflight=1)
+
+    def __address(self,address):
+        if not address:
+            address = self.address
+        return address
+
+    def __submit(self, cmd, kind='frame', address=None, parse=None, timeout=None, recover_t=0.0):
+        op = {
+            'cmd'       : cmd,
+            'kind'      : kind,
+            'address'   : address,
+            'parse'     : parse,
+            'timeout'   : timeout or self.timeout,
+            'recover_t' : recover_t,
+            'request'   : AsyncRequest(),
+            }
+        self.op_queue.append(op)
+        if self.op is None:
+            self.__start_next()
+        return op['request']
+
+    def __start_next(self):
+        self.op = None
+        while self.op_queue and self.op is None:
+            op = self.op_queue.popleft()
+            try:
+                self.comm.write(op['cmd'])
+            except Exception, err:
+                op['request'].set_error(err)
+                continue
+            op['state'] = 'reply'
+            op['start_t'] = time.time()
+            op['deadline'] = op['start_t'] + op['timeout']
+            self.op = op
+        if self.op is not None:
+            self.__advance()
+
+    def __advance(self):
+        """
+        Advance current operation using the replies in the buffer
+        """
+        op = self.op
+        if op is None:
+            return
+        if op['state'] == 'drain':
+            while op['nframe'] > 0 and self.reader.poll_line() is not None:
+                op['nframe'] -= 1
+            if op['nframe'] == 0:
+                self.__start_next()
+        elif op['state'] == 'reply':
+            self.__advance_reply(op)
+        elif op['state'] == 'poll':
+            rtn_str = self.reader.poll_line()
+            if rtn_str is None:
+                return
+            try:
+                poll_int = BAI.parse_serial_poll(rtn_str, op['address'])
+            except (IOError, ValueError):
+                poll_int = None
+            if poll_int is not None and BAI.is_ready(poll_int):
+                self.__succeed(time.time() - op['recover_start'])
+            else:
+                self.__poll_failed()
+
+    def __advance_reply(self, op):
+        if op['kind'] == 'chrs':
+            if self.reader.poll_chrs(BAI.WRITE_RETURN_NCHAR) is None:
+                return
+            value = time.time() - op['start_t']
+        elif op['kind'] == 'line':
+            value = self.reader.poll_line()
+            if value is None:
+                return
+        else:
+            value = self.reader.poll_payload(op['address'])
+            if value is None:
+                return
+            if op['parse'] is not None:
+                try:
+                    value = op['parse'](value)
+                except Exception, err:
+                    self.__fail(err)
+                    return
+
+        if op['recover_t'] > 0:
+            # Hold device, polling it, until drive has recovered
+            op['recover_start'] = time.time()
+            self.__send_poll()
+        else:
+            self.__succeed(value)
+
+    def __send_poll(self):
+        """
+        Serial poll drive during recovery, see BAI.wait_ready
+        """
+        op = self.op
+        cmd = BAI.create_serial_poll_cmd(op['address'])
+        self.reader.clear()
+        try:
+            self.comm.write(cmd)
+        except Exception, err:
+            self.__fail(err)
+            return
+        op['state'] = 'poll'
+        op['deadline'] = time.time() + BAI.serial_poll_timeout(cmd, self.comm.getBaudrate())
+
+    def __poll_failed(self):
+        """
+        Drive not ready - poll again after RECOVERY_POLL_T unless the
+        recovery time is up
+        """
+        op = self.op
+        now = time.time()
+        if now - op['recover_start'] > op['recover_t']:
+            self.__fail(IOError('drive not ready after %1.1f s'%(op['recover_t'],)))
+            return
+        op['state'] = 'poll_wait'
+        op['deadline'] = now + BAI.RECOVERY_POLL_T
+
+    def __drain(self, nframe):
+        """
+        Discard the next nframe replies, or the chrs arriving until the
+        line is quiet, before starting the next operation. Used after a
+        timeout, as for BAI.__read_params_drive, so that late replies
+        aren't taken as replies to the commands which follow.
+        """
+        op = self.op
+        op['state'] = 'drain'
+        op['nframe'] = nframe
+        op['deadline'] = time.time() + self.__quiet_t()
+        self.__advance()
+
+    def __quiet_t(self):
+        return max(self.timeout, BAI.DFLT_TIMEOUT)
+
+    def __succeed(self, value):
+        req = self.op['request']
+        self.__finish()
+        req.set_result(value)
+
+    def __fail(self, err, nflight=0):
+        req = self.op['request']
+        if nflight > 0:
+            self.__drain(nflight)
+        else:
+            self.__finish()
+        req.set_error(err)
+
+    def __finish(self):
+        # Start next operation before firing callbacks so that requests
+        # made from a callback are queued behind those already waiting.
+        self.__start_next()
+
+
+class AsyncLoop:
+
+    """
+    Select based event loop which services a set of AsyncBAI devices
+    """
+
+    def __init__(self):
+        self.dev_list = []
+
+    def add(self,dev):
+        if not dev in self.dev_list:
+            self.dev_list.append(dev)
+        dev.loop = self
+
+    def remove(self,dev):
+        if dev in self.dev_list:
+            self.dev_list.remove(dev)
+
+    def run_once(self,timeout=None):
+        """
+        Wait for at most timeout seconds for devices to become readable
+        or reach their deadlines and service them.
+        """
+        now = time.time()
+        deadline_list = [d.deadline() for d in self.dev_list]
+        deadline_list = [t for t in deadline_list if t is not None]
+        if deadline_list:
+            wait_t = max(0.0, min(deadline_list) - now)
+            if timeout is not None:
+                wait_t = min(wait_t, timeout)
+        else:
+            wait_t = timeout
+
+        if self.dev_list:
+            readable, w, x = select.select(self.dev_list, [], [], wait_t)
+        else:
+            if wait_t:
+                time.sleep(wait_t)
+            readable = []
+
+        for dev in readable:
+            dev.handle_read()
+        now = time.time()
+        for dev in list(self.dev_list):
+            dev.handle_timer(now)
+
+    def run_until_complete(self,request,timeout=None):
+        """
+        Run loop until request, or list of requests, is complete.
+        Returns the result or list of results.
+        """
+        if type(request) == list:
+            request_list = request
+        else:
+            request_list = [request]
+        if timeout is not None:
+            end_t = time.time() + timeout
+        while not all([r.done for r in request_list]):
+            if timeout is not None:
+                wait_t = end_t - time.time()
+                if wait_t <= 0:
+                    raise IOError, 'timeout waiting for requests to complete'
+                self.run_once(wait_t)
+            else:
+                self.run_once()
+        if type(request) == list:
+            return [r.result() for r in request_list]
+        else:
+            return request.result()
@@ -0,0 +1,314 @@
+"""
+-----------------------------------------------------------------------
+pyBAI
+Copyright (C) William Dickson, 2008.
+
+wbd@caltech.edu
+www.willdickson.com
+
+Released under the LGPL Licence, Version 3
+
+This file is part of pyBAI.
+
+pyBAI is free software: you can redistribute it and/or modify it
+under the terms of the GNU Lesser General Public License as published
+by the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+pyBAI is distributed in the hope that it will be useful, but
+WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public
+License along with pyBAI.  If not, see <http://www.gnu.org/licenses/>.
+
+------------------------------------------------------------------------
+
+Purpose: Provides a scheduler for multiple BA-Intellidrives daisy
+chained on a single serial bus. Requests are tagged with a drive
+address, queued per drive and serviced round robin so that no drive is
+starved.
+
+Example:
+
+  bus = BusScheduler(BAI(port='/dev/ttyS0'))
+  bus.start()
+  req_list = [bus.submit(a, 'get_position') for a in 'ABCD']
+  pos_list = [req.wait() for req in req_list]
+  bus.stop()
+
+Author: William Dickson
+
+------------------------------------------------------------------------
+"""
+import collections
+import inspect
+import threading
+import time
+
+class BusRequest:
+
+    """
+    Request submitted to the bus scheduler. Call wait() to block until
+    the request has been carried out and get its result.
+    """
+
+    def __init__(self, address, method, args, kwargs):
+        self.address = address
+        self.method = method
+        self.args = args
+        self.kwargs = kwargs
+        self.value = None
+        self.error = None
+        self.submit_t = time.time()
+        self.event = threading.Event()
+
+    def done(self):
+        return self.event.isSet()
+
+    def set_result(self,value):
+        self.value = value
+        self.event.set()
+
+    def set_error(self,error):
+        self.error = error
+        self.event.set()
+
+    def wait(self,timeout=None):
+        """
+        Wait for request to complete and return its result
+        """
+        self.event.wait(timeout)
+        if not self.event.isSet():
+            raise IOError, 'timeout waiting for bus request'
+        if self.error is not None:
+            raise self.error
+        return self.value
+
+class BusScheduler:
+
+    """
+    Owns the BAI device for a serial bus and carries out requests for
+    the drives on it. Each drive address has its own queue and the
+    queues are serviced round robin. When a drive's turn comes up,
+    consecutive read_param requests at the head of its queue (up to
+    the device's pipeline depth) are sent together as one pipelined
+    read_params so the line is kept busy.
+    """
+
+    def __init__(self, dev):
+        self.dev = dev
+        self.queues = {}
+        self.order = []
+        self.next_index = 0
+        self.cond = threading.Condition()
+        self.stats = {}
+        self.start_t = time.time()
+        self.thread = None
+        self.running = False
+
+    def submit(self, address, method, *args, **kwargs):
+        """
+        Queue request to call BAI method, given by name, for drive
+        with given address. Returns a BusRequest.
+        """
+        if not hasattr(self.dev, method):
+            raise ValueError, "unknown BAI method '%s'"%(method,)
+        req = BusRequest(address, method, args, kwargs)
+        self.cond.acquire()
+        try:
+            if not self.queues.has_key(address):
+                self.queues[address] = collections.deque()
+                self.order.append(address)
+                self.stats[address] = new_stats()
+            queue = self.queues[address]
+            queue.append(req)
+            stats = self.stats[address]
+            stats['submitted'] += 1
+            stats['max queue depth'] = max(stats['max queue depth'], len(queue))
+            self.cond.notify()
+        finally:
+            self.cond.release()
+        return req
+
+    def step(self):
+        """
+        Carry out the next drive's turn. Returns False if there was
+        nothing to do.
+        """
+        self.cond.acquire()
+        try:
+            req_list = self.__next_turn()
+        finally:
+            self.cond.release()
+        if not req_list:
+            return False
+        self.__run(req_list)
+        return True
+
+    def run_pending(self):
+        """
+        Carry out all queued requests in the calling thread
+        """
+        while self.step():
+            pass
+
+    def start(self):
+        """
+        Start servicing requests in a background thread
+        """
+        if self.thread is not None:
+            return
+        self.running = True
+        self.thread = threading.Thread(target=self.__worker)
+        self.thread.setDaemon(True)
+        self.thread.start()
+
+    def stop(self):
+        """
+        Stop background thread once the queues are empty
+        """
+        if self.thread is None:
+            return
+        self.cond.acquire()
+        self.running = False
+        self.cond.notify()
+        self.cond.release()
+        self.thread.join()
+        self.thread = None
+
+    def get_stats(self):
+        """
+        Returns dictionary of per drive counters keyed by address. The
+        throughput is the number of completed requests per second since
+        the scheduler was created.
+        """
+        self.cond.acquire()
+        try:
+            elapsed = time.time() - self.start_t
+            stats_dict = {}
+            for address, stats in self.stats.iteritems():
+                stats = dict(stats)
+                stats['queue depth'] = len(self.queues[address])
+                if elapsed > 0:
+                    stats['throughput'] = stats['completed']/elapsed
+                else:
+                    stats['throughput'] = 0.0
+                stats_dict[address] = stats
+        finally:
+            self.cond.release()
+        return stats_dict
+
+    def __next_turn(self):
+        """
+        Pop requests for next drive (in round robin order) which has
+        requests waiting.
+        """
+        for i in range(len(self.order)):
+            address = self.order[(self.next_index + i)%len(self.order)]
+            queue = self.queues[address]
+            if not queue:
+                continue
+            self.next_index = (self.next_index + i + 1)%len(self.order)
+            req_list = [queue.popleft()]
+            if is_plain_read(req_list[0]):
+                depth = max(1,self.dev.pipeline_depth)
+                while queue and len(req_list) < depth and is_plain_read(queue[0]):
+                    req_list.append(queue.popleft())
+            return req_list
+        return []
+
+    def __run(self, req_list):
+        address = req_list[0].address
+        t0 = time.time()
+        if len(req_list) > 1 and all([is_plain_read(r) for r in req_list]):
+            param_list = [r.args[0] for r in req_list]
+            try:
+                val_list = self.dev.read_params(param_list, address=address)
+            except Exception, err:
+                # Fall back to reading individually so that errors end
+                # up with the request that caused them
+                for req in req_list:
+                    self.__run([req])
+                return
+            for req, val in zip(req_list, val_list):
+                req.set_result(val)
+            ok = True
+        else:
+            req = req_list[0]
+            func = getattr(self.dev, req.method)
+            kwargs = dict(req.kwargs)
+            if accepts_arg(func, 'address'):
+                kwargs['address'] = address
+            # Methods with a strict argument, e.g. get_position, are
+            # tried strictly first so that a failure is counted as an
+            # error. If the request isn't strict the method is then run
+            # as asked and its own fallback is the result.
+            nonstrict = accepts_arg(func, 'strict') and not kwargs.get('strict', False)
+            try:
+                if nonstrict:
+                    req.set_result(func(*req.args, **dict(kwargs, strict=True)))
+                else:
+                    req.set_result(func(*req.args, **kwargs))
+                ok = True
+            except Exception, err:
+                ok = False
+                if nonstrict:
+                    try:
+                        req.set_result(func(*req.args, **kwargs))
+                    except Exception, err:
+                        req.set_error(err)
+                else:
+                    req.set_error(err)
+        busy_t = time.time() - t0
+
+        self.cond.acquire()
+        try:
+            stats = self.stats[address]
+            stats['busy time'] += busy_t
+            if ok:
+                stats['completed'] += len(req_list)
+            else:
+                stats['errors'] += len(req_list)
+        finally:
+            self.cond.release()
+
+    def __worker(self):
+        while True:
+            self.cond.acquire()
+            try:
+                while self.running and not any(self.queues.values()):
+                    self.cond.wait()
+                if not self.running and not any(self.queues.values()):
+                    return
+            finally:
+                self.cond.release()
+            self.step()
+
+# ---------------------------------------------------------------
+def new_stats():
+    """
+    Returns new per drive counters
+    """
+    return {
+        'submitted' : 0,
+        'completed' : 0,
+        'errors' : 0,
+        'busy time' : 0.0,
+        'max queue depth' : 0,
+        }
+
+def is_plain_read(req):
+    """
+    Returns True if request is a read_param with no extra arguments
+    and so can be combined into a pipelined read_params.
+    """
+    return req.method == 'read_param' and len(req.args) == 1 and not req.kwargs
+
+def accepts_arg(func, name):
+    """
+    Returns True if function, or method, has an argument with the given
+    name
+    """
+    return name in inspect.getargspec(func)[0]
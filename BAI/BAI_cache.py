@@ -0,0 +1,131 @@
+"""
+-----------------------------------------------------------------------
+pyBAI
+Copyright (C) William Dickson, 2008.
+
+wbd@caltech.edu
+www.willdickson.com
+
+Released under the LGPL Licence, Version 3
+
+This file is part of pyBAI.
+
+pyBAI is free software: you can redistribute it and/or modify it
+under the terms of the GNU Lesser General Public License as published
+by the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+pyBAI is distributed in the hope that it will be useful, but
+WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public
+License along with pyBAI.  If not, see <http://www.gnu.org/licenses/>.
+
+------------------------------------------------------------------------
+
+Purpose: Provides a small on-disk cache of the last confirmed
+connection settings (baud rate, unit address and remote/local mode)
+for each serial port. The cache file has the same format as the
+.bai_options file with one section per serial port, e.g.
+
+  [/dev/ttyS0]
+  baudrate = 38400
+  address = A
+  mode = remote
+
+Author: William Dickson
+
+------------------------------------------------------------------------
+"""
+import ConfigParser
+import os
+import os.path
+import threading
+
+# Constants
+CACHE_FILE = '.bai_cache'
+MODE_REMOTE = 'remote'
+MODE_LOCAL = 'local'
+
+class ConnCache:
+
+    """
+    Per serial port connection cache
+    """
+
+    def __init__(self, filename=None):
+        if filename is None:
+            filename = os.path.join(os.environ.get('HOME','.'), CACHE_FILE)
+        self.filename = filename
+        self.lock = threading.Lock()
+
+    def get(self, port):
+        """
+        Returns dictionary with keys baudrate, address and mode for
+        given port or None if the port isn't in the cache.
+        """
+        config = self.__read()
+        if not config.has_section(port):
+            return None
+        entry = {'baudrate' : None, 'address' : None, 'mode' : None}
+        try:
+            if config.has_option(port, 'baudrate'):
+                entry['baudrate'] = config.getint(port, 'baudrate')
+            if config.has_option(port, 'address'):
+                entry['address'] = config.get(port, 'address')
+            if config.has_option(port, 'mode'):
+                entry['mode'] = config.get(port, 'mode')
+        except ValueError:
+            return None
+        return entry
+
+    def update(self, port, **kwargs):
+        """
+        Update cache entry for port. Keyword arguments are baudrate,
+        address and mode. Arguments which are None are left unchanged.
+        """
+        self.lock.acquire()
+        try:
+            config = self.__read()
+            if not config.has_section(port):
+                config.add_section(port)
+            for k in ('baudrate', 'address', 'mode'):
+                v = kwargs.get(k)
+                if v is not None:
+                    config.set(port, k, str(v))
+            self.__write(config)
+        finally:
+            self.lock.release()
+
+    def invalidate(self, port):
+        """
+        Remove cache entry for port
+        """
+        self.lock.acquire()
+        try:
+            config = self.__read()
+            if config.has_section(port):
+                config.remove_section(port)
+                self.__write(config)
+        finally:
+            self.lock.release()
+
+    def __read(self):
+        config = ConfigParser.RawConfigParser()
+        try:
+            config.read(self.filename)
+        except ConfigParser.Error:
+            # Corrupt cache - start again
+            config = ConfigParser.RawConfigParser()
+        return config
+
+    def __write(self, config):
+        # Write to temporary file and rename so that the cache file is
+        # never left half written
+        tmp_filename = '%s.%d.tmp'%(self.filename, os.getpid())
+        fid = open(tmp_filename, 'w')
+        config.write(fid)
+        fid.close()
+        os.rename(tmp_filename, self.filename)
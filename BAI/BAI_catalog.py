@@ -0,0 +1,186 @@
+"""
+-----------------------------------------------------------------------
+pyBAI
+Copyright (C) William Dickson, 2008.
+
+wbd@caltech.edu
+www.willdickson.com
+
+Released under the LGPL Licence, Version 3
+
+This file is part of pyBAI.
+
+pyBAI is free software: you can redistribute it and/or modify it
+under the terms of the GNU Lesser General Public License as published
+by the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+pyBAI is distributed in the hope that it will be useful, but
+WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public
+License along with pyBAI.  If not, see <http://www.gnu.org/licenses/>.
+
+------------------------------------------------------------------------
+
+Purpose: Provides the compiled parameter catalog. BAI_data.PARAM_TABLE
+is compiled once into Param records, indexed by name, number and alias,
+each with its own cast, range check and reply conversion functions so
+that no type dispatch or dictionary lookups are needed per value.
+
+Example:
+
+  param = CATALOG.lookup('baud_rate')
+  val = param.cast('19200')
+  param.check(val)
+
+Author: William Dickson
+
+------------------------------------------------------------------------
+"""
+import BAI_data
+
+# Alternative names for parameters, in addition to the automatic lower
+# case and underscore forms of the names
+PARAM_ALIAS_DICT = {
+    'baudrate' : 'baud rate',
+    }
+
+class Param(object):
+
+    """
+    Parameter record
+    """
+
+    __slots__ = ('name', 'num', 'type', 'min', 'max', 'default', 'allowed',
+                 'cast', 'check', 'convert')
+
+    def __init__(self, name, num, val_type, min_val, max_val, default, allowed=None):
+        self.name = name
+        self.num = num
+        self.type = val_type
+        self.min = min_val
+        self.max = max_val
+        self.default = default
+        self.allowed = allowed
+        self.cast = CAST_FUNC_DICT[val_type]
+        self.convert = CONVERT_FUNC_DICT[val_type]
+        self.check = create_check_func(val_type, min_val, max_val)
+
+    def __repr__(self):
+        return 'Param(%r, %d)'%(self.name, self.num)
+
+class ParamCatalog:
+
+    """
+    Parameters indexed by name, number and alias
+    """
+
+    def __init__(self, param_table, param_extra={}, alias_dict={}):
+        self.param_list = []
+        self.by_name = {}
+        self.by_num = {}
+        self.by_alias = {}
+        for name, num, val_type, min_val, max_val, default in param_table:
+            allowed = param_extra.get(name, {}).get('allowed')
+            param = Param(name, num, val_type, min_val, max_val, default, allowed)
+            self.param_list.append(param)
+            self.by_name[name] = param
+            self.by_num[num] = param
+
+        # Aliases never hide a parameter name
+        for param in self.param_list:
+            for alias in (param.name.lower(), param.name.replace(' ','_'),
+                          param.name.lower().replace(' ','_')):
+                if not self.by_name.has_key(alias):
+                    self.by_alias.setdefault(alias, param)
+        for alias, name in alias_dict.iteritems():
+            self.by_alias[alias] = self.by_name[name]
+
+    def __getitem__(self, name):
+        return self.by_name[name]
+
+    def __contains__(self, name):
+        return self.by_name.has_key(name)
+
+    def __len__(self):
+        return len(self.param_list)
+
+    def __iter__(self):
+        return iter(self.param_list)
+
+    def lookup(self, key):
+        """
+        Returns parameter given its name, alias or number (int or
+        string of digits). Raises KeyError if there is no such
+        parameter.
+        """
+        try:
+            return self.by_name[key]
+        except KeyError:
+            pass
+        except TypeError:
+            raise KeyError, key
+        if type(key) == int:
+            return self.by_num[key]
+        try:
+            return self.by_alias[key]
+        except KeyError:
+            pass
+        try:
+            return self.by_num[int(key)]
+        except (ValueError, TypeError):
+            raise KeyError, key
+
+# ---------------------------------------------------------------
+def cast_chr(val):
+    return str(ord(val))
+
+def convert_chr(rtn_str):
+    return chr(int(rtn_str))
+
+def convert_str(rtn_str):
+    # Could be wrong ??
+    return rtn_str
+
+CAST_FUNC_DICT = {
+    BAI_data.BAI_INT   : int,
+    BAI_data.BAI_FLOAT : float,
+    BAI_data.BAI_STR   : str,
+    BAI_data.BAI_CHR   : cast_chr,
+    }
+
+CONVERT_FUNC_DICT = {
+    BAI_data.BAI_INT   : int,
+    BAI_data.BAI_FLOAT : float,
+    BAI_data.BAI_STR   : convert_str,
+    BAI_data.BAI_CHR   : convert_chr,
+    }
+
+def create_check_func(val_type, min_val, max_val):
+    """
+    Returns range check function for parameter. The function raises
+    ValueError if the (cast) value is out of range.
+    """
+    if val_type in (BAI_data.BAI_INT, BAI_data.BAI_FLOAT):
+        def check(val):
+            if val < min_val:
+                raise ValueError, 'numerical parameter < minimum allowed value'
+            if val > max_val:
+                raise ValueError, 'numerical parameter > maximum allowed value'
+    elif val_type == BAI_data.BAI_CHR:
+        min_ord = ord(min_val)
+        max_ord = ord(max_val)
+        def check(val):
+            if int(val) < min_ord:
+                raise ValueError, 'character parameter < minimum allowed value'
+            if int(val) > max_ord:
+                raise ValueError, 'character parameter > maximum allowed value'
+    else:
+        def check(val):
+            pass
+    return check
+
+CATALOG = ParamCatalog(BAI_data.PARAM_TABLE, BAI_data.PARAM_EXTRA, PARAM_ALIAS_DICT)
@@ -0,0 +1,454 @@
+"""
+-----------------------------------------------------------------------
+pyBAI
+Copyright (C) William Dickson, 2008.
+
+wbd@caltech.edu
+www.willdickson.com
+
+Released under the LGPL Licence, Version 3
+
+This file is part of pyBAI.
+
+pyBAI is free software: you can redistribute it and/or modify it
+under the terms of the GNU Lesser General Public License as published
+by the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+pyBAI is distributed in the hope that it will be useful, but
+WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public
+License along with pyBAI.  If not, see <http://www.gnu.org/licenses/>.
+
+------------------------------------------------------------------------
+
+Purpose: Provides a daemon which keeps BAI devices open, one per
+serial port, and runs bai command line commands sent to it over a Unix
+socket. The bai command forwards to the daemon when it is running so
+that the port setup and baud rate search aren't repeated for every
+command.
+
+Messages in both directions are a single type chr followed by a 4 byte
+big endian length and the data:
+
+  client -> daemon   R - request (JSON: argv, progname, cwd)
+                     S - stop daemon
+                     I - stdin line, empty at end of file
+  daemon -> client   O - stdout data
+                     E - stderr data
+                     N - stdin line wanted
+                     X - command finished, data is the exit code
+
+Commands are run one at a time with stdout, stderr and stdin connected
+to the client, so prompts from interactive commands work as they do
+when the command is run directly. The client only reads stdin when the
+command asks for a line, so commands which don't read it leave it
+untouched, e.g. for the rest of a shell loop.
+
+The socket is kept in $XDG_RUNTIME_DIR, or a private directory in the
+temporary directory, and is only used if it and its directory belong
+to the user and the directory isn't accessible to anyone else.
+
+Author: William Dickson
+
+------------------------------------------------------------------------
+"""
+import json
+import optparse
+import os
+import socket
+import stat
+import struct
+import sys
+import tempfile
+import traceback
+import cmd_line
+
+# Constants
+SOCKET_NAME = 'bai-daemon.sock'
+MSG_HEADER_FMT = '>cI'
+MSG_HEADER_SIZE = struct.calcsize(MSG_HEADER_FMT)
+
+def default_socket_path():
+    """
+    Returns default socket path - in $XDG_RUNTIME_DIR if it is set,
+    otherwise in a per user directory in the temporary directory.
+    """
+    runtime_dir = os.environ.get('XDG_RUNTIME_DIR')
+    if not runtime_dir:
+        runtime_dir = os.path.join(tempfile.gettempdir(), 'bai-daemon-%d'%(os.getuid(),))
+    return os.path.join(runtime_dir, SOCKET_NAME)
+
+DFLT_SOCKET = default_socket_path()
+
+class BAIDaemon:
+
+    """
+    Serves bai commands on a Unix socket using persistent BAI devices
+    """
+
+    def __init__(self, socket_path=DFLT_SOCKET, verbose=False):
+        self.socket_path = socket_path
+        self.verbose = verbose
+        self.dev_dict = {}
+        self.sock = None
+        self.running = False
+
+    def serve_forever(self):
+        """
+        Accept and serve clients until stopped
+        """
+        make_socket_dir(self.socket_path)
+        if is_running(self.socket_path):
+            raise IOError, 'bai daemon already running on %s'%(self.socket_path,)
+        if os.path.lexists(self.socket_path):
+            # Stale socket left by a daemon which didn't exit cleanly
+            os.remove(self.socket_path)
+        old_umask = os.umask(0077)
+        try:
+            self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self.sock.bind(self.socket_path)
+        finally:
+            os.umask(old_umask)
+        self.sock.listen(5)
+        self.running = True
+        try:
+            while self.running:
+                conn, addr = self.sock.accept()
+                try:
+                    self.handle(conn)
+                except (socket.error, IOError), err:
+                    self.log('client error: %s'%(err,))
+                conn.close()
+        finally:
+            self.close()
+
+    def close(self):
+        """
+        Close socket and devices
+        """
+        self.running = False
+        if self.sock is not None:
+            self.sock.close()
+            self.sock = None
+            if os.path.exists(self.socket_path):
+                os.remove(self.socket_path)
+        for dev in self.dev_dict.values():
+            try:
+                dev.close()
+            except:
+                pass
+        self.dev_dict = {}
+
+    def handle(self, conn):
+        """
+        Serve single client request
+        """
+        session = Session(conn)
+        kind, data = recv_msg(conn)
+        if kind == 'S':
+            self.log('stopping')
+            self.running = False
+            send_msg(conn, 'X', '0')
+            return
+        if kind != 'R':
+            return
+        req = json.loads(data)
+        self.log('command: %s'%(' '.join(req['argv']),))
+
+        old_stdout, old_stderr, old_stdin = sys.stdout, sys.stderr, sys.stdin
+        old_cwd = os.getcwd()
+        sys.stdout = session
+        sys.stderr = Session(conn, kind='E')
+        sys.stdin = session
+        rtn_code = 0
+        cmd = None
+        try:
+            try:
+                os.chdir(req['cwd'])
+                cmd = cmd_line.BAI_Cmd_Line(argv=[str(x) for x in req['argv']],
+                                            progname=str(req['progname']),
+                                            connect=False)
+                cmd.attach(self.get_dev(cmd))
+                cmd.run()
+            except SystemExit, err:
+                rtn_code = exit_code(err)
+            except Exception, err:
+                traceback.print_exc()
+                rtn_code = 1
+                # Serial errors may leave the device in a bad state -
+                # reopen it next time
+                if isinstance(err, IOError) and cmd is not None:
+                    self.drop_dev(cmd.options['port'])
+        finally:
+            sys.stdout, sys.stderr, sys.stdin = old_stdout, old_stderr, old_stdin
+            os.chdir(old_cwd)
+        send_msg(conn, 'X', str(rtn_code))
+
+    def get_dev(self, cmd):
+        """
+        Returns open BAI device for the port in the command's options,
+        creating it if required.
+        """
+        port = cmd.options['port']
+        dev = self.dev_dict.get(port)
+        if dev is None or not dev.comm.isOpen():
+            self.log('opening %s'%(port,))
+            dev = cmd.create_dev()
+            self.dev_dict[port] = dev
+        return dev
+
+    def drop_dev(self, port):
+        dev = self.dev_dict.pop(port, None)
+        if dev is not None:
+            try:
+                dev.close()
+            except:
+                pass
+
+    def log(self, msg):
+        if self.verbose == True:
+            sys.__stdout__.write('bai-daemon: %s\n'%(msg,))
+            sys.__stdout__.flush()
+
+class Session:
+
+    """
+    File like object connecting a command's stdout (or stderr) and stdin
+    to the client.
+    """
+
+    def __init__(self, conn, kind='O'):
+        self.conn = conn
+        self.kind = kind
+        self.in_buf = ''
+        self.in_eof = False
+        self.softspace = 0
+
+    def write(self, data):
+        send_msg(self.conn, self.kind, str(data))
+
+    def flush(self):
+        pass
+
+    def isatty(self):
+        return False
+
+    def readline(self):
+        while not '\n' in self.in_buf and not self.in_eof:
+            send_msg(self.conn, 'N')
+            kind, data = recv_msg(self.conn)
+            if kind is None:
+                self.in_eof = True
+            elif kind == 'I':
+                if data:
+                    self.in_buf += data
+                else:
+                    self.in_eof = True
+        n = self.in_buf.find('\n')
+        if n < 0:
+            line, self.in_buf = self.in_buf, ''
+        else:
+            line, self.in_buf = self.in_buf[:n+1], self.in_buf[n+1:]
+        return line
+
+# ---------------------------------------------------------------
+def send_msg(sock, kind, data=''):
+    sock.sendall(struct.pack(MSG_HEADER_FMT, kind, len(data)) + data)
+
+def recv_msg(sock):
+    """
+    Receive single message. Returns (kind, data), kind is None if the
+    connection was closed.
+    """
+    header = recv_all(sock, MSG_HEADER_SIZE)
+    if header is None:
+        return None, ''
+    kind, n = struct.unpack(MSG_HEADER_FMT, header)
+    data = recv_all(sock, n)
+    if data is None:
+        return None, ''
+    return kind, data
+
+def recv_all(sock, n):
+    data = ''
+    while len(data) < n:
+        chunk = sock.recv(n - len(data))
+        if not chunk:
+            return None
+        data += chunk
+    return data
+
+def exit_code(err):
+    """
+    Returns integer exit code of SystemExit exception
+    """
+    if err.code is None:
+        return 0
+    if type(err.code) == int:
+        return err.code
+    print >> sys.stderr, err.code
+    return 1
+
+def make_socket_dir(socket_path):
+    """
+    Create private directory for socket if it doesn't exist and check
+    that it is safe to use
+    """
+    dirname = os.path.dirname(os.path.abspath(socket_path))
+    if not os.path.lexists(dirname):
+        os.mkdir(dirname, 0700)
+    check_socket_dir(dirname)
+
+def check_socket_dir(dirname):
+    """
+    Raises IOError unless directory belongs to the user and can't be
+    accessed by anyone else
+    """
+    st = os.lstat(dirname)
+    if not stat.S_ISDIR(st.st_mode):
+        raise IOError, '%s is not a directory'%(dirname,)
+    if st.st_uid != os.getuid():
+        raise IOError, '%s is not owned by the user'%(dirname,)
+    if st.st_mode & 0077:
+        raise IOError, '%s is accessible by other users'%(dirname,)
+
+def check_socket(socket_path):
+    """
+    Raises IOError unless socket and its directory belong to the user
+    """
+    check_socket_dir(os.path.dirname(os.path.abspath(socket_path)))
+    st = os.lstat(socket_path)
+    if not stat.S_ISSOCK(st.st_mode):
+        raise IOError, '%s is not a socket'%(socket_path,)
+    if st.st_uid != os.getuid():
+        raise IOError, '%s is not owned by the user'%(socket_path,)
+
+def connect(socket_path=DFLT_SOCKET):
+    """
+    Connect to daemon. Returns socket or None if the daemon isn't
+    running. Raises IOError if the socket isn't safe to use.
+    """
+    if not os.path.lexists(socket_path):
+        return None
+    check_socket(socket_path)
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(socket_path)
+    except socket.error:
+        sock.close()
+        return None
+    return sock
+
+def is_running(socket_path=DFLT_SOCKET):
+    try:
+        sock = connect(socket_path)
+    except (IOError, OSError):
+        return False
+    if sock is None:
+        return False
+    sock.close()
+    return True
+
+def forward(argv, progname, socket_path=DFLT_SOCKET):
+    """
+    Run bai command on the daemon, copying its output to stdout and
+    stderr and stdin lines to it when the command reads them. Returns
+    the command's exit code or None if the daemon isn't running.
+    """
+    try:
+        sock = connect(socket_path)
+    except (IOError, OSError), err:
+        print >> sys.stderr, 'WARNING: not using bai daemon - %s'%(err,)
+        return None
+    if sock is None:
+        return None
+    req = {'argv': argv, 'progname': progname, 'cwd': os.getcwd()}
+    try:
+        try:
+            send_msg(sock, 'R', json.dumps(req))
+        except socket.error:
+            # Daemon went away - run the command directly
+            return None
+        while True:
+            try:
+                kind, data = recv_msg(sock)
+            except socket.error:
+                kind = None
+            if kind is None:
+                print >> sys.stderr, 'ERROR: connection to bai daemon lost'
+                return 1
+            elif kind == 'O':
+                sys.stdout.write(data)
+                sys.stdout.flush()
+            elif kind == 'E':
+                sys.stderr.write(data)
+            elif kind == 'N':
+                line = read_stdin_line()
+                try:
+                    send_msg(sock, 'I', line)
+                except socket.error:
+                    # Daemon closed first - keep reading what it sent
+                    pass
+            elif kind == 'X':
+                return int(data)
+    finally:
+        sock.close()
+
+def read_stdin_line():
+    """
+    Read one line from stdin without reading ahead, so that the rest of
+    stdin is left for whoever reads it next
+    """
+    fd = sys.stdin.fileno()
+    chr_list = []
+    while True:
+        c = os.read(fd, 1)
+        if not c:
+            break
+        chr_list.append(c)
+        if c == '\n':
+            break
+    return ''.join(chr_list)
+
+def stop(socket_path=DFLT_SOCKET):
+    """
+    Stop running daemon. Returns False if it wasn't running.
+    """
+    sock = connect(socket_path)
+    if sock is None:
+        return False
+    try:
+        send_msg(sock, 'S')
+        recv_msg(sock)
+    finally:
+        sock.close()
+    return True
+
+def daemon_main():
+    """
+    bai-daemon entry point
+    """
+    parser = optparse.OptionParser(usage='%prog [options]')
+    parser.add_option('-s', '--socket', dest='socket_path', default=DFLT_SOCKET,
+                      help='unix socket path (default %s)'%(DFLT_SOCKET,))
+    parser.add_option('-v', '--verbose', action='store_true', dest='verbose', default=False,
+                      help='log commands to stdout')
+    parser.add_option('--stop', action='store_true', dest='stop', default=False,
+                      help='stop the running daemon')
+    options, args = parser.parse_args()
+    if options.stop == True:
+        if not stop(options.socket_path):
+            print 'bai daemon not running'
+        return
+    daemon = BAIDaemon(socket_path=options.socket_path, verbose=options.verbose)
+    try:
+        daemon.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    except (IOError, OSError), err:
+        print >> sys.stderr, 'ERROR: %s'%(err,)
+        sys.exit(1)
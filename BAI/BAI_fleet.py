@@ -0,0 +1,214 @@
+"""
+-----------------------------------------------------------------------
+pyBAI
+Copyright (C) William Dickson, 2008.
+
+wbd@caltech.edu
+www.willdickson.com
+
+Released under the LGPL Licence, Version 3
+
+This file is part of pyBAI.
+
+pyBAI is free software: you can redistribute it and/or modify it
+under the terms of the GNU Lesser General Public License as published
+by the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+pyBAI is distributed in the hope that it will be useful, but
+WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public
+License along with pyBAI.  If not, see <http://www.gnu.org/licenses/>.
+
+------------------------------------------------------------------------
+
+Purpose: Runs BAI operations across a fleet of BA-Intellidrives on
+many serial ports in parallel. There is one worker thread per serial
+port, drives sharing a port are handled in turn by that port's worker,
+and the number of ports being worked on at once is capped.
+
+Example:
+
+  inventory = [('/dev/ttyS0','A',9600), ('/dev/ttyS1','A',38400)]
+  fleet = Fleet(inventory, max_workers=8)
+  report = fleet.run('param_to_file', 'param_%(port)s_%(address)s.txt')
+  print_report(report)
+
+Author: William Dickson
+
+------------------------------------------------------------------------
+"""
+import os.path
+import threading
+import time
+import BAI
+
+# Constants
+DFLT_MAX_WORKERS = 8
+FLEET_OPS = ('param_to_file', 'get_nondefault', 'get_status', 'param_from_file')
+
+class Fleet:
+
+    """
+    Fleet of BA-Intellidrives given by an inventory, which is a list
+    of (port, address, baudrate) tuples.
+    """
+
+    def __init__(self, inventory, max_workers=DFLT_MAX_WORKERS, timeout=BAI.DFLT_TIMEOUT):
+        self.inventory = list(inventory)
+        self.max_workers = max_workers
+        self.timeout = timeout
+
+    def run(self, op, *args, **kwargs):
+        """
+        Run BAI operation, op, on every drive in the inventory. String
+        arguments may contain %(port)s and %(address)s which are
+        replaced with the port name and address of each drive, e.g. to
+        give each drive its own parameter file.
+
+        Returns a report, which is a list with one dictionary per drive
+        in inventory order, see run_drive.
+        """
+        if not op in FLEET_OPS:
+            raise ValueError, "unknown fleet operation '%s'"%(op,)
+
+        # Group drives by port, keeping inventory order
+        port_list = []
+        port_dict = {}
+        for i, (port, address, baudrate) in enumerate(self.inventory):
+            if not port_dict.has_key(port):
+                port_dict[port] = []
+                port_list.append(port)
+            port_dict[port].append((i, address, baudrate))
+
+        report = [None]*len(self.inventory)
+        sem = threading.Semaphore(self.max_workers)
+        thread_list = []
+        for port in port_list:
+            t = threading.Thread(target=self.__port_worker,
+                                 args=(sem, port, port_dict[port], report, op, args, kwargs))
+            t.setDaemon(True)
+            t.start()
+            thread_list.append(t)
+        for t in thread_list:
+            t.join()
+        return report
+
+    def __port_worker(self, sem, port, drive_list, report, op, args, kwargs):
+        """
+        Run operation on all drives for a single serial port
+        """
+        sem.acquire()
+        try:
+            dev = None
+            try:
+                dev = BAI.BAI(address=drive_list[0][1],
+                              port=port,
+                              timeout=self.timeout,
+                              baudrate=drive_list[0][2])
+            except Exception, err:
+                for i, address, baudrate in drive_list:
+                    report[i] = new_entry(port, address, baudrate)
+                    report[i]['error'] = err
+                return
+            try:
+                for i, address, baudrate in drive_list:
+                    report[i] = run_drive(dev, port, address, baudrate, op, args, kwargs)
+            finally:
+                dev.close()
+        finally:
+            sem.release()
+
+# ---------------------------------------------------------------
+def run_drive(dev, port, address, baudrate, op, args, kwargs):
+    """
+    Run operation on a single drive. Returns dictionary with the keys
+    port, address, baudrate, ok, value, error and time.
+    """
+    entry = new_entry(port, address, baudrate)
+    subs = {'port' : os.path.basename(port), 'address' : address}
+    t0 = time.time()
+    try:
+        args = [sub_arg(a, subs) for a in args]
+        if dev.comm.getBaudrate() != baudrate:
+            dev.comm.setBaudrate(baudrate)
+        func = getattr(dev, op)
+        entry['value'] = func(address=address, *args, **kwargs)
+        entry['ok'] = True
+    except Exception, err:
+        entry['error'] = err
+    entry['time'] = time.time() - t0
+    return entry
+
+def new_entry(port, address, baudrate):
+    """
+    Returns new (failed) report entry for drive
+    """
+    return {
+        'port' : port,
+        'address' : address,
+        'baudrate' : baudrate,
+        'ok' : False,
+        'value' : None,
+        'error' : None,
+        'time' : 0.0,
+        }
+
+def sub_arg(arg, subs):
+    """
+    Substitute port and address into string arguments. Only the
+    %(port)s and %(address)s placeholders are replaced, any other %
+    chrs are left as they are.
+    """
+    if isinstance(arg, basestring):
+        for k, v in subs.iteritems():
+            arg = arg.replace('%%(%s)s'%(k,), v)
+    return arg
+
+def read_inventory(filename):
+    """
+    Read inventory file. Each line gives the port, address and baud
+    rate of a drive separated by white space. Blank lines and lines
+    starting with # are ignored.
+    """
+    inventory = []
+    fid = open(filename,'r')
+    for i, line in enumerate(fid.readlines()):
+        line = line.strip()
+        if not line or line.startswith('#'):
+            continue
+        line_split = line.split()
+        if len(line_split) != 3:
+            fid.close()
+            raise ValueError, 'incorrect inventory format on line %d'%(i,)
+        port, address, baudrate = line_split
+        inventory.append((port, address, int(baudrate)))
+    fid.close()
+    return inventory
+
+def print_report(report):
+    """
+    Print fleet report
+    """
+    print
+    print 'Port              Addr  Baud    Result  Time (s)'
+    print BAI.DISPLAY_LINE
+    for entry in report:
+        port_str = '%s'%(entry['port'],)
+        print port_str,
+        print ' '*(16 - len(port_str)),
+        print '%s   '%(entry['address'],),
+        baud_str = '%d'%(entry['baudrate'],)
+        print baud_str,
+        print ' '*(6 - len(baud_str)),
+        if entry['ok']:
+            print 'ok     ',
+        else:
+            print 'FAILED ',
+        print '%1.3f'%(entry['time'],)
+        if not entry['ok']:
+            print '  error:', entry['error']
+    print
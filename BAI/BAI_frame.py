@@ -0,0 +1,289 @@
+"""
+-----------------------------------------------------------------------
+pyBAI
+Copyright (C) William Dickson, 2008.
+
+wbd@caltech.edu
+www.willdickson.com
+
+Released under the LGPL Licence, Version 3
+
+This file is part of pyBAI.
+
+pyBAI is free software: you can redistribute it and/or modify it
+under the terms of the GNU Lesser General Public License as published
+by the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+pyBAI is distributed in the hope that it will be useful, but
+WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public
+License along with pyBAI.  If not, see <http://www.gnu.org/licenses/>.
+
+------------------------------------------------------------------------
+
+Purpose: Provides a framing layer for replies from the BA-Intellidrive.
+Chrs read from the serial port are kept in a preallocated receive
+buffer which is scanned for the start and stop chrs. Complete frames
+are handed out as memoryview slices of the buffer, integers are parsed
+directly from the buffer and any garbage between frames is skipped so
+that a garbled reply doesn't misalign the replies that follow it.
+
+A reply frame is START_CHRS + address + payload + STOP_CHRS.
+
+Author: William Dickson
+
+------------------------------------------------------------------------
+"""
+import time
+
+# Constants
+DFLT_BUF_SIZE = 4096
+START_STR = chr(3) + chr(2)
+STOP_STR = chr(10)
+
+class FrameReader:
+
+    """
+    Reads reply frames from serial port, comm, using a reusable receive
+    buffer. Memoryviews returned by read_frame are only valid until the
+    next read.
+    """
+
+    def __init__(self, comm, size=DFLT_BUF_SIZE, start_str=START_STR, stop_str=STOP_STR):
+        self.comm = comm
+        self.buf = bytearray(size)
+        self.view = memoryview(self.buf)
+        self.head = 0
+        self.tail = 0
+        self.start_str = start_str
+        self.stop_str = stop_str
+        self.resync_count = 0
+
+    def clear(self):
+        """
+        Discard buffered chrs and flush serial port input
+        """
+        self.head = 0
+        self.tail = 0
+        self.comm.flushInput()
+
+    def drain(self, quiet_t, nframe=None):
+        """
+        Discard buffered chrs and chrs still arriving on the serial
+        port. Stops once nframe frames (stop chrs) have been discarded,
+        if given, or when nothing has arrived for quiet_t seconds. Used
+        after an error so that late replies aren't taken as replies to
+        the next commands. Returns the number of frames discarded.
+        """
+        count = self.buf.count(self.stop_str, self.head, self.tail)
+        self.head = 0
+        self.tail = 0
+        old_timeout = self.comm.getTimeout()
+        self.comm.setTimeout(quiet_t)
+        try:
+            while nframe is None or count < nframe:
+                data = self.comm.read(max(1, self.comm.inWaiting()))
+                if not data:
+                    break
+                count += data.count(self.stop_str)
+        finally:
+            self.comm.setTimeout(old_timeout)
+        return count
+
+    def read_frame(self, address=None, timeout=None):
+        """
+        Read next complete frame and return memoryview of its body, i.e.
+        address + payload. If address is given frames from other
+        addresses are skipped. Raises IOError if no frame arrives within
+        timeout (defaults to the serial port timeout).
+        """
+        start, stop = self.__next_frame(address, timeout)
+        return self.view[start:stop]
+
+    def read_int(self, address=None, timeout=None):
+        """
+        Read next frame and parse its payload as an integer directly
+        from the receive buffer.
+        """
+        start, stop = self.__next_frame(address, timeout)
+        return int(buffer(self.buf, start+1, stop-start-1))
+
+    def read_payload(self, address=None, timeout=None):
+        """
+        Read next frame and return its payload as a string
+        """
+        start, stop = self.__next_frame(address, timeout)
+        return str(self.buf[start+1:stop])
+
+    def read_chrs(self, nchar, timeout=None):
+        """
+        Read exactly nchar raw chrs. Raises IOError if they haven't all
+        arrived within timeout.
+        """
+        deadline = self.__deadline(timeout)
+        while self.tail - self.head < nchar:
+            if not self.__fill(deadline):
+                raise IOError, 'serial read (timeout) - too few return characters'
+        return self.poll_chrs(nchar)
+
+    def read_line(self, timeout=None):
+        """
+        Read raw chrs up to and including the stop chrs. Returns what
+        has been read, which may be incomplete, on timeout.
+        """
+        deadline = self.__deadline(timeout)
+        while True:
+            rtn_str = self.poll_line()
+            if rtn_str is not None:
+                return rtn_str
+            if not self.__fill(deadline):
+                rtn_str = str(self.buf[self.head:self.tail])
+                self.head = self.tail
+                return rtn_str
+
+    def read_available(self):
+        """
+        Read the chrs waiting on the serial port into the buffer without
+        blocking. Returns the number read.
+        """
+        nchar = self.comm.inWaiting()
+        if nchar == 0:
+            return 0
+        return self.__read(nchar)
+
+    def poll_payload(self, address=None):
+        """
+        Non-blocking read_payload - returns the payload of the next
+        complete frame already in the buffer or None if there isn't
+        one. See read_available.
+        """
+        frame = self.__scan_frame(address)
+        if frame is None:
+            return None
+        start, stop = frame
+        return str(self.buf[start+1:stop])
+
+    def poll_chrs(self, nchar):
+        """
+        Non-blocking read_chrs - returns nchar raw chrs if they are in
+        the buffer or None.
+        """
+        if self.tail - self.head < nchar:
+            return None
+        rtn_str = str(self.buf[self.head:self.head+nchar])
+        self.head += nchar
+        return rtn_str
+
+    def poll_line(self):
+        """
+        Non-blocking read_line - returns the raw chrs up to and
+        including the stop chrs if they are in the buffer or None.
+        """
+        n = self.buf.find(self.stop_str, self.head, self.tail)
+        if n < 0:
+            return None
+        n += len(self.stop_str)
+        rtn_str = str(self.buf[self.head:n])
+        self.head = n
+        return rtn_str
+
+    def __deadline(self, timeout):
+        if timeout is None:
+            timeout = self.comm.getTimeout()
+        if timeout is None:
+            return None
+        return time.time() + timeout
+
+    def __next_frame(self, address, timeout):
+        """
+        Find next complete frame in buffer, reading more chrs as
+        required. Returns (start, stop) indices of the frame body.
+        """
+        deadline = self.__deadline(timeout)
+        while True:
+            frame = self.__scan_frame(address)
+            if frame is not None:
+                return frame
+            if not self.__fill(deadline):
+                raise IOError, 'serial read (timeout) - no reply frame'
+
+    def __scan_frame(self, address):
+        """
+        Find next complete frame in the chrs already in the buffer,
+        skipping garbage and frames from other addresses. Returns
+        (start, stop) indices of the frame body or None.
+        """
+        nstart = len(self.start_str)
+        while True:
+            # Find start chrs, skipping any garbage before them
+            start = self.buf.find(self.start_str, self.head, self.tail)
+            if start < 0:
+                # Keep a possible partial start sequence
+                keep = min(nstart - 1, self.tail - self.head)
+                if self.tail - keep > self.head:
+                    self.resync_count += 1
+                    self.head = self.tail - keep
+                return None
+            if start > self.head:
+                self.resync_count += 1
+                self.head = start
+            body = start + nstart
+            stop = self.buf.find(self.stop_str, body, self.tail)
+            if stop < 0:
+                return None
+            # Another start before the stop means the frame was cut
+            # short - resync on the later start
+            restart = self.buf.find(self.start_str, body, stop)
+            if restart >= 0:
+                self.resync_count += 1
+                self.head = restart
+                continue
+            self.head = stop + len(self.stop_str)
+            if stop == body:
+                self.resync_count += 1
+                continue
+            if address and chr(self.buf[body]) != address:
+                continue
+            return body, stop
+
+    def __fill(self, deadline):
+        """
+        Read available chrs from serial port into buffer. Blocks for up
+        to the serial port timeout if none are waiting. Returns False if
+        nothing was read and the deadline has passed.
+        """
+        if deadline is not None and time.time() > deadline:
+            return False
+        if self.__read(max(1, self.comm.inWaiting())):
+            return True
+        return deadline is None or time.time() <= deadline
+
+    def __read(self, nchar):
+        """
+        Read up to nchar chrs from serial port into buffer, making room
+        for them first. Returns the number read.
+        """
+        if self.head == self.tail:
+            self.head = 0
+            self.tail = 0
+        elif self.tail + nchar > len(self.buf):
+            # Compact - move unread chrs to front of buffer
+            n = self.tail - self.head
+            self.buf[0:n] = self.buf[self.head:self.tail]
+            self.head = 0
+            self.tail = n
+        nchar = min(nchar, len(self.buf) - self.tail)
+        if nchar == 0:
+            # Buffer full of garbage with no frame - discard it
+            self.resync_count += 1
+            self.head = 0
+            self.tail = 0
+            nchar = 1
+        data = self.comm.read(nchar)
+        self.buf[self.tail:self.tail+len(data)] = data
+        self.tail += len(data)
+        return len(data)
@@ -0,0 +1,114 @@
+"""
+-----------------------------------------------------------------------
+pyBAI
+Copyright (C) William Dickson, 2008.
+
+wbd@caltech.edu
+www.willdickson.com
+
+Released under the LGPL Licence, Version 3
+
+This file is part of pyBAI.
+
+pyBAI is free software: you can redistribute it and/or modify it
+under the terms of the GNU Lesser General Public License as published
+by the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+pyBAI is distributed in the hope that it will be useful, but
+WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public
+License along with pyBAI.  If not, see <http://www.gnu.org/licenses/>.
+
+------------------------------------------------------------------------
+
+Purpose: Provides a write-through shadow copy of drive parameters.
+Values are filled in by reads and updated by acknowledged writes. Each
+value carries an unsaved flag which is set by writes and cleared when
+the parameters are saved to flash.
+
+Author: William Dickson
+
+------------------------------------------------------------------------
+"""
+import time
+
+class ParamShadow:
+
+    """
+    Shadow copy of drive parameters keyed by (address, parameter). If
+    ttl is not None, values older than ttl seconds are treated as
+    missing and will be read from the drive again.
+    """
+
+    def __init__(self, ttl=None):
+        self.ttl = ttl
+        self.entries = {}
+
+    def get(self, address, param):
+        """
+        Returns (True, value) if parameter value is in the shadow copy
+        and is fresh, otherwise returns (False, None).
+        """
+        try:
+            val, update_t, unsaved = self.entries[(address, param)]
+        except KeyError:
+            return False, None
+        if self.ttl is not None and time.time() - update_t > self.ttl:
+            return False, None
+        return True, val
+
+    def set(self, address, param, val, unsaved=False):
+        """
+        Set shadow value. Once set, a parameter stays unsaved until
+        mark_saved is called, even if it is read again.
+        """
+        key = (address, param)
+        if self.entries.has_key(key):
+            unsaved = unsaved or self.entries[key][2]
+        self.entries[key] = (val, time.time(), unsaved)
+
+    def mark_saved(self, address):
+        """
+        Clear unsaved flags after parameters are saved to flash
+        """
+        for key, (val, update_t, unsaved) in self.entries.items():
+            if key[0] == address and unsaved:
+                self.entries[key] = (val, update_t, False)
+
+    def move_address(self, old_address, new_address):
+        """
+        Move values to a new address after the drive's unit address
+        has been changed.
+        """
+        if old_address == new_address:
+            return
+        for key in self.entries.keys():
+            if key[0] == old_address:
+                self.entries[(new_address, key[1])] = self.entries.pop(key)
+
+    def invalidate(self, address=None, param=None):
+        """
+        Remove values for given address and/or parameter. With no
+        arguments the whole shadow copy is cleared.
+        """
+        for key in self.entries.keys():
+            if address is not None and key[0] != address:
+                continue
+            if param is not None and key[1] != param:
+                continue
+            del self.entries[key]
+
+    def unsaved(self, address):
+        """
+        Returns list of (parameter, value) pairs which have been
+        written but not yet saved to flash.
+        """
+        unsaved_list = []
+        for (a, param), (val, update_t, unsaved) in self.entries.iteritems():
+            if a == address and unsaved:
+                unsaved_list.append((param, val))
+        return unsaved_list
@@ -0,0 +1,268 @@
+"""
+-----------------------------------------------------------------------
+pyBAI
+Copyright (C) William Dickson, 2008.
+
+wbd@caltech.edu
+www.willdickson.com
+
+Released under the LGPL Licence, Version 3
+
+This file is part of pyBAI.
+
+pyBAI is free software: you can redistribute it and/or modify it
+under the terms of the GNU Lesser General Public License as published
+by the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+pyBAI is distributed in the hope that it will be useful, but
+WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public
+License along with pyBAI.  If not, see <http://www.gnu.org/licenses/>.
+
+------------------------------------------------------------------------
+
+Purpose: Provides a virtual BA-Intellidrive which runs over a pseudo
+terminal. Used for benchmarking and testing without hardware.
+
+The simulated drive speaks the same framing as create_cmd. Replies to
+RP, PS, PX and Q are returned as START_CHRS + address + value +
+STOP_CHRS. WP returns WRITE_RETURN_NCHAR acknowledgement chrs and SP,
+RE and toggle mode return a line. Line time for each chr is modelled
+from the drive's baud rate along with a per command processing
+latency. If the port's baud rate doesn't match that of the drive the
+reply is garbled as it would be on a real link.
+
+Example:
+
+  sim = SimBAI()
+  sim.start()
+  dev = BAI(port=sim.port)
+  dev.print_param()
+  dev.close()
+  sim.stop()
+
+Author: William Dickson
+
+------------------------------------------------------------------------
+"""
+import os
+import pty
+import select
+import termios
+import threading
+import time
+import tty
+import BAI
+import BAI_data
+
+# Constants
+DFLT_CMD_LATENCY = 0.001
+DFLT_RESET_T = 0.5
+DFLT_SAVE_T = 0.2
+DFLT_TOGGLE_T = 0.2
+BITS_PER_CHR = 10
+GARBAGE_CHR = chr(0xff)
+
+class SimBAI:
+
+    """
+    Virtual BA-Intellidrive on a pseudo terminal. Connect to it by
+    opening the slave device given by the port attribute.
+    """
+
+    def __init__(self,
+                 address=BAI.DFLT_ADDRESS,
+                 baudrate=None,
+                 cmd_latency=DFLT_CMD_LATENCY,
+                 line_time=True
+                 ):
+
+        # Parameter stores seeded with defaults. The RAM values are
+        # those in use, the flash values are those restored on reset.
+        self.flash = {}
+        for param, param_dict in BAI_data.PARAM_DICT.iteritems():
+            self.flash[param] = param_dict['default']
+        self.flash['unit address'] = address
+        if baudrate is not None:
+            self.flash['baud rate'] = baudrate
+        self.ram = dict(self.flash)
+        self.baudrate = self.ram['baud rate']
+
+        self.num2param = dict(BAI_data.NUM2PARAM_LIST)
+        self.cmd_latency = cmd_latency
+        self.reset_t = DFLT_RESET_T
+        self.save_t = DFLT_SAVE_T
+        self.toggle_t = DFLT_TOGGLE_T
+        self.line_time = line_time
+        self.remote = True
+        self.status = 0
+        self.position = 0
+        self.busy_until = 0.0
+        self.cmd_count = 0
+
+        # Pseudo terminal pair
+        self.master, self.slave = pty.openpty()
+        tty.setraw(self.slave)
+        self.port = os.ttyname(self.slave)
+
+        self.thread = None
+        self.running = False
+
+    def start(self):
+        """
+        Start simulated drive in background thread
+        """
+        if self.thread is not None:
+            return
+        self.running = True
+        self.thread = threading.Thread(target=self.__run)
+        self.thread.setDaemon(True)
+        self.thread.start()
+
+    def stop(self):
+        """
+        Stop simulated drive and close pseudo terminal
+        """
+        self.running = False
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+        os.close(self.master)
+        os.close(self.slave)
+
+    def get_baudrate(self):
+        """
+        Returns current baud rate of the drive. As on the real drive a
+        new baud rate parameter only takes effect after a reset.
+        """
+        return self.baudrate
+
+    def get_line_baudrate(self):
+        """
+        Returns the baud rate the port has been set to by the client
+        """
+        ospeed = termios.tcgetattr(self.slave)[5]
+        for b in BAI.allowed_baudrates():
+            if getattr(termios, 'B%d'%(b,), None) == ospeed:
+                return b
+        return None
+
+    def __run(self):
+        buf = ''
+        start_str = ''.join(BAI.START_CHRS)
+        stop_str = ''.join(BAI.STOP_CHRS)
+        toggle_chrs = BAI_data.SYS_CMD_DICT['toggle mode']['cmd']
+        while self.running:
+            r, w, x = select.select([self.master], [], [], 0.05)
+            if not r:
+                continue
+            try:
+                data = os.read(self.master, 1024)
+            except OSError:
+                break
+            self.__line_wait(len(data))
+            buf += data
+            while True:
+                n = buf.find(stop_str)
+                if n < 0:
+                    break
+                frame, buf = buf[:n], buf[n+len(stop_str):]
+                m = frame.rfind(start_str)
+                if m < 0:
+                    continue
+                frame = frame[m+len(start_str):]
+                if frame == toggle_chrs:
+                    self.__toggle()
+                    continue
+                try:
+                    self.__command(frame)
+                except (ValueError, KeyError, IndexError):
+                    # Malformed command - no reply, as for a real drive
+                    pass
+
+    def __command(self, frame):
+        """
+        Carry out a command frame (address + command + args)
+        """
+        if not self.remote or len(frame) < 2:
+            return
+        address, frame = frame[0], frame[1:]
+        if address != self.ram['unit address']:
+            return
+
+        # Drive is busy saving to flash or resetting
+        now = time.time()
+        if now < self.busy_until:
+            return
+
+        if self.cmd_latency > 0:
+            time.sleep(self.cmd_latency)
+        self.cmd_count += 1
+
+        arg_list = frame.split()
+        cmd = arg_list.pop(0)
+        if cmd == 'RP':
+            param = self.num2param[int(arg_list[0])]
+            val = self.ram[param]
+            if BAI_data.PARAM_DICT[param]['type'] == BAI_data.BAI_CHR:
+                val = ord(val)
+            self.__reply_val(address, val)
+        elif cmd == 'WP':
+            param = self.num2param[int(arg_list[0])]
+            self.ram[param] = BAI.convert_val(param, ' '.join(arg_list[1:]))
+            self.__reply(''.join(BAI.START_CHRS) + ''.join(BAI.STOP_CHRS))
+        elif cmd == 'PS':
+            self.__reply_val(address, self.status)
+        elif cmd == 'PX':
+            self.__reply_val(address, self.position)
+        elif cmd == 'Q':
+            self.__reply_val(address, self.status & 0xff)
+        elif cmd == 'SP':
+            self.flash = dict(self.ram)
+            self.__reply(''.join(BAI.STOP_CHRS))
+            self.busy_until = time.time() + self.save_t
+        elif cmd == 'RE':
+            self.__reply(''.join(BAI.STOP_CHRS))
+            self.ram = dict(self.flash)
+            self.baudrate = self.ram['baud rate']
+            self.busy_until = time.time() + self.reset_t
+
+    def __toggle(self):
+        self.remote = not self.remote
+        self.__reply(''.join(BAI.STOP_CHRS))
+        self.busy_until = time.time() + self.toggle_t
+
+    def __reply_val(self, address, val):
+        rtn_str = ''.join(BAI.START_CHRS) + address + str(val) + ''.join(BAI.STOP_CHRS)
+        self.__reply(rtn_str)
+
+    def __reply(self, rtn_str):
+        """
+        Send reply, garbled if the port and drive baud rates differ
+        """
+        line_baudrate = self.get_line_baudrate()
+        if line_baudrate is not None and line_baudrate != self.get_baudrate():
+            rtn_str = GARBAGE_CHR*len(rtn_str)
+        self.__line_wait(len(rtn_str))
+        try:
+            os.write(self.master, rtn_str)
+        except OSError:
+            pass
+
+    def __line_wait(self, nchar):
+        """
+        Wait for time taken to send nchar chrs at the drive's baud rate
+        """
+        if self.line_time:
+            time.sleep(wire_time(nchar, self.get_baudrate()))
+
+# ---------------------------------------------------------------
+def wire_time(nchar, baudrate):
+    """
+    Returns time taken to send nchar chrs at the given baud rate
+    """
+    return float(nchar*BITS_PER_CHR)/baudrate
@@ -0,0 +1,312 @@
+"""
+-----------------------------------------------------------------------
+pyBAI
+Copyright (C) William Dickson, 2008.
+
+wbd@caltech.edu
+www.willdickson.com
+
+Released under the LGPL Licence, Version 3
+
+This file is part of pyBAI.
+
+pyBAI is free software: you can redistribute it and/or modify it
+under the terms of the GNU Lesser General Public License as published
+by the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+pyBAI is distributed in the hope that it will be useful, but
+WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public
+License along with pyBAI.  If not, see <http://www.gnu.org/licenses/>.
+
+------------------------------------------------------------------------
+
+Purpose: Provides a store of drive configuration snapshots. Each
+configuration is written once as an immutable blob, in the param_to_file
+format, named by the SHA-1 hash of its contents, so identical
+configurations share a blob. Each snapshot (drive, port, address, baud
+rate, time and label) is a row in an sqlite index pointing at its blob.
+
+Store layout:
+
+  DIR/index.db          - snapshot index
+  DIR/blobs/ab/cdef...  - configuration blobs
+
+Example:
+
+  store = SnapshotStore()
+  snap_id = store.capture(dev, drive='x-axis')
+  ...
+  for num, param, old, new in store.changes_since('x-axis', time.time() - 30*86400):
+      print param, old, '->', new
+
+Author: William Dickson
+
+------------------------------------------------------------------------
+"""
+import cStringIO
+import hashlib
+import os
+import os.path
+import sqlite3
+import tempfile
+import time
+import BAI
+import BAI_catalog
+import BAI_data
+
+# Constants
+SNAPSHOT_DIR = '.bai_snapshots'
+INDEX_FILE = 'index.db'
+BLOB_DIR = 'blobs'
+BLOB_CACHE_SIZE = 256
+
+INDEX_SCHEMA = """\
+CREATE TABLE IF NOT EXISTS snapshot (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    hash TEXT NOT NULL,
+    drive TEXT NOT NULL,
+    port TEXT,
+    address TEXT,
+    baudrate INTEGER,
+    time REAL NOT NULL,
+    label TEXT
+    );
+CREATE INDEX IF NOT EXISTS snapshot_drive_time ON snapshot (drive, time);
+CREATE INDEX IF NOT EXISTS snapshot_hash ON snapshot (hash);
+"""
+
+SNAPSHOT_KEYS = ('id', 'hash', 'drive', 'port', 'address', 'baudrate', 'time', 'label')
+
+class SnapshotStore:
+
+    """
+    Content addressed store of drive configuration snapshots
+    """
+
+    def __init__(self, path=None):
+        if path is None:
+            path = os.path.join(os.environ.get('HOME','.'), SNAPSHOT_DIR)
+        self.path = path
+        self.blob_path = os.path.join(path, BLOB_DIR)
+        if not os.path.isdir(self.blob_path):
+            os.makedirs(self.blob_path)
+        self.db = sqlite3.connect(os.path.join(path, INDEX_FILE))
+        self.db.executescript(INDEX_SCHEMA)
+        self.db.commit()
+        self.blob_cache = {}
+
+    def close(self):
+        self.db.close()
+
+    def capture(self, dev, address=None, drive=None, label=None):
+        """
+        Read all parameters from drive and add them as a snapshot.
+        drive defaults to 'port:address'. Returns snapshot id.
+        """
+        if not address:
+            address = dev.address
+        val_list = dev.read_params(BAI_data.PARAM_LIST, address=address)
+        return self.add(zip(BAI_data.PARAM_LIST, val_list),
+                        drive = drive,
+                        port = dev.comm.port,
+                        address = address,
+                        baudrate = dev.comm.getBaudrate(),
+                        label = label)
+
+    def add(self, param_list, drive=None, port=None, address=None, baudrate=None, t=None, label=None):
+        """
+        Add snapshot of list of (parameter, value) pairs. Values may be
+        given as in a parameters file or as read from the drive.
+        Returns snapshot id.
+        """
+        if drive is None:
+            drive = '%s:%s'%(port, address)
+        if t is None:
+            t = time.time()
+        blob = create_blob(param_list)
+        blob_hash = hashlib.sha1(blob).hexdigest()
+        self.__write_blob(blob_hash, blob)
+        cursor = self.db.execute(
+            'INSERT INTO snapshot (hash, drive, port, address, baudrate, time, label) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?)',
+            (blob_hash, drive, port, address, baudrate, t, label))
+        self.db.commit()
+        return cursor.lastrowid
+
+    def import_file(self, filename, **kwargs):
+        """
+        Add snapshot from parameters file, as written by param_to_file.
+        Keyword arguments are as for add. Returns snapshot id.
+        """
+        return self.add(BAI.read_param_file(filename), **kwargs)
+
+    def export_file(self, snap_id, filename):
+        """
+        Write snapshot to parameters file which can be loaded with
+        param_from_file.
+        """
+        blob = self.__read_blob(self.get(snap_id)['hash'])
+        fid = open(filename, 'w')
+        fid.write(blob)
+        fid.close()
+
+    def get(self, snap_id):
+        """
+        Returns snapshot metadata dictionary
+        """
+        row = self.db.execute('SELECT * FROM snapshot WHERE id = ?', (snap_id,)).fetchone()
+        if row is None:
+            raise KeyError, 'no snapshot with id %s'%(snap_id,)
+        return row2dict(row)
+
+    def values(self, snap_id):
+        """
+        Returns dictionary of parameter values in snapshot
+        """
+        return dict(self.__blob_values(self.get(snap_id)['hash']))
+
+    def diff(self, snap_id_0, snap_id_1):
+        """
+        Returns list of (num, param, value 0, value 1) for parameters
+        which differ between two snapshots. A parameter missing from
+        one snapshot has value None there.
+        """
+        return self.__diff_hash(self.get(snap_id_0)['hash'], self.get(snap_id_1)['hash'])
+
+    def history(self, drive, since=None, until=None):
+        """
+        Returns list of snapshot metadata dictionaries for drive, in
+        time order, optionally limited to since <= time < until.
+        """
+        query = 'SELECT * FROM snapshot WHERE drive = ?'
+        args = [drive]
+        if since is not None:
+            query += ' AND time >= ?'
+            args.append(since)
+        if until is not None:
+            query += ' AND time < ?'
+            args.append(until)
+        query += ' ORDER BY time, id'
+        return [row2dict(row) for row in self.db.execute(query, args)]
+
+    def latest(self, drive, before=None):
+        """
+        Returns metadata of latest snapshot of drive, taken before time
+        before if given, or None if there isn't one.
+        """
+        query = 'SELECT * FROM snapshot WHERE drive = ?'
+        args = [drive]
+        if before is not None:
+            query += ' AND time < ?'
+            args.append(before)
+        query += ' ORDER BY time DESC, id DESC LIMIT 1'
+        row = self.db.execute(query, args).fetchone()
+        if row is None:
+            return None
+        return row2dict(row)
+
+    def changes_since(self, drive, t):
+        """
+        Returns diff between the drive's configuration at time t (its
+        latest snapshot before t, or its first snapshot after t) and its
+        latest snapshot.
+        """
+        new = self.latest(drive)
+        if new is None:
+            return []
+        old = self.latest(drive, before=t)
+        if old is None:
+            old = self.history(drive, since=t)[0]
+        return self.__diff_hash(old['hash'], new['hash'])
+
+    def drives(self):
+        """
+        Returns list of drives with snapshots
+        """
+        return [str(row[0]) for row in self.db.execute('SELECT DISTINCT drive FROM snapshot ORDER BY drive')]
+
+    def __diff_hash(self, hash_0, hash_1):
+        if hash_0 == hash_1:
+            return []
+        val_dict_0 = dict(self.__blob_values(hash_0))
+        val_dict_1 = dict(self.__blob_values(hash_1))
+        diff_list = []
+        for num, param in BAI_data.NUM2PARAM_LIST:
+            val_0 = val_dict_0.get(param)
+            val_1 = val_dict_1.get(param)
+            if val_0 != val_1:
+                diff_list.append((num, param, val_0, val_1))
+        return diff_list
+
+    def __blob_values(self, blob_hash):
+        """
+        Returns list of (parameter, value string) in blob, cached
+        """
+        try:
+            return self.blob_cache[blob_hash]
+        except KeyError:
+            pass
+        val_list = []
+        for line in self.__read_blob(blob_hash).splitlines():
+            num_str, param, val = line.split()
+            val_list.append((param.replace('_',' '), val))
+        if len(self.blob_cache) >= BLOB_CACHE_SIZE:
+            self.blob_cache.clear()
+        self.blob_cache[blob_hash] = val_list
+        return val_list
+
+    def __blob_filename(self, blob_hash):
+        return os.path.join(self.blob_path, blob_hash[:2], blob_hash[2:])
+
+    def __write_blob(self, blob_hash, blob):
+        filename = self.__blob_filename(blob_hash)
+        if os.path.exists(filename):
+            # Already stored - blobs are immutable
+            return
+        dirname = os.path.dirname(filename)
+        if not os.path.isdir(dirname):
+            os.makedirs(dirname)
+        fd, tmp_name = tempfile.mkstemp(dir=dirname)
+        try:
+            os.write(fd, blob)
+        finally:
+            os.close(fd)
+        os.chmod(tmp_name, 0444)
+        os.rename(tmp_name, filename)
+
+    def __read_blob(self, blob_hash):
+        fid = open(self.__blob_filename(blob_hash), 'r')
+        blob = fid.read()
+        fid.close()
+        return blob
+
+# ---------------------------------------------------------------
+def create_blob(param_list):
+    """
+    Create canonical parameters file contents from list of (parameter,
+    value) pairs - parameter number order with values cast to the
+    parameter type - so that equal configurations give equal blobs.
+    """
+    val_dict = {}
+    for param, val in param_list:
+        rec = BAI_catalog.CATALOG[param]
+        val_dict[rec.num] = (rec.name, rec.convert(rec.cast(val)))
+    writer = cStringIO.StringIO()
+    num_list = val_dict.keys()
+    num_list.sort()
+    for num in num_list:
+        param, val = val_dict[num]
+        BAI.write_param_to_file(writer, num, param, val)
+    return writer.getvalue()
+
+def row2dict(row):
+    meta = dict(zip(SNAPSHOT_KEYS, row))
+    for k in ('hash', 'drive', 'port', 'address', 'label'):
+        if meta[k] is not None:
+            meta[k] = str(meta[k])
+    return meta
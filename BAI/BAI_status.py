@@ -0,0 +1,263 @@
+"""
+-----------------------------------------------------------------------
+pyBAI
+Copyright (C) William Dickson, 2008.
+
+wbd@caltech.edu
+www.willdickson.com
+
+Released under the LGPL Licence, Version 3
+
+This file is part of pyBAI.
+
+pyBAI is free software: you can redistribute it and/or modify it
+under the terms of the GNU Lesser General Public License as published
+by the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+pyBAI is distributed in the hope that it will be useful, but
+WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public
+License along with pyBAI.  If not, see <http://www.gnu.org/licenses/>.
+
+------------------------------------------------------------------------
+
+Purpose: Provides decoding of recorded status words and monitoring of
+status changes. The bit table in BAI_data.STATUS_LIST is compiled once
+into (name, shift, nbits) fields. Arrays of raw status words are decoded
+in a single vectorized pass with numpy (optional, only required by
+decode_status_array).
+
+Multi-bit fields (opto input, opto output and Hall) are decoded as
+integers with the lowest bit of the field as bit 0.
+
+Example:
+
+  def on_change(name, val, old_val):
+      print name, old_val, '->', val
+
+  monitor = StatusMonitor(BAI(baudrate=38400))
+  monitor.subscribe(on_change, ['axis fault', 'rms fault'])
+  monitor.start(period=0.01)
+
+Author: William Dickson
+
+------------------------------------------------------------------------
+"""
+import sys
+import threading
+import time
+import traceback
+import BAI_data
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+def compile_status_fields(status_list):
+    """
+    Compile status bit table into list of (name, shift, nbits) tuples.
+    The bits of multi-bit fields must be contiguous.
+    """
+    field_list = []
+    for b, msg in status_list:
+        if type(b) == list:
+            bit_list = b
+        else:
+            bit_list = [b]
+        shift = bit_index(bit_list[0])
+        for i, x in enumerate(bit_list):
+            if x != 1<<(shift + i):
+                raise ValueError, "bits of status field '%s' not contiguous"%(msg,)
+        field_list.append((msg, shift, len(bit_list)))
+    return field_list
+
+def bit_index(b):
+    """
+    Returns index of single set bit in b
+    """
+    n = 0
+    while b > 1:
+        if b & 1:
+            raise ValueError, 'more than one bit set'
+        b = b >> 1
+        n += 1
+    return n
+
+STATUS_FIELDS = compile_status_fields(BAI_data.STATUS_LIST)
+STATUS_MASKS = [(name, ((1<<nbits)-1)<<shift, shift) for name, shift, nbits in STATUS_FIELDS]
+STATUS_MASK_DICT = dict([(name, mask) for name, mask, shift in STATUS_MASKS])
+ALL_MASK = reduce(lambda x,y: x|y, STATUS_MASK_DICT.values())
+
+class StatusMonitor:
+
+    """
+    Polls the raw status word and reports only the status fields which
+    have changed since the previous poll. Subscribed callbacks are
+    called as func(name, val, old_val) with values as in get_status.
+
+    When the status word hasn't changed a poll costs one comparison.
+    The first poll is compared against a status word of 0 so that
+    fields which are already set are reported. An exception raised by
+    a callback is reported on stderr and counted in callback_errors,
+    it doesn't stop the other callbacks or the polling.
+    """
+
+    def __init__(self, dev, address=None):
+        self.dev = dev
+        self.address = address
+        self.word = 0
+        self.mask = 0
+        self.sub_list = []
+        self.poll_count = 0
+        self.bad_count = 0
+        self.callback_errors = 0
+        self.thread = None
+        self.running = False
+
+    def subscribe(self, func, fields=None):
+        """
+        Call func when any of the status fields in list fields change.
+        If fields is None func is called for all fields.
+        """
+        if fields is None:
+            mask = ALL_MASK
+        else:
+            mask = 0
+            for name in fields:
+                if not STATUS_MASK_DICT.has_key(name):
+                    raise ValueError, "unknown status field '%s'"%(name,)
+                mask |= STATUS_MASK_DICT[name]
+        self.sub_list.append((mask, func))
+        self.__update_mask()
+
+    def unsubscribe(self, func):
+        """
+        Remove all subscriptions of func
+        """
+        self.sub_list = [(m, f) for m, f in self.sub_list if f != func]
+        self.__update_mask()
+
+    def poll(self):
+        """
+        Read status word from drive and fire callbacks for changed
+        fields. Returns the changed bits (0 if nothing changed).
+        """
+        word = self.dev.get_status_word(address=self.address)
+        self.poll_count += 1
+        old_word = self.word
+        if word == old_word:
+            return 0
+        self.word = word
+        changed = word ^ old_word
+        if changed & self.mask:
+            self.__dispatch(changed, word, old_word)
+        return changed
+
+    def events(self, period=0.0):
+        """
+        Generator which polls the drive every period seconds and
+        yields (name, val, old_val) events for changed fields.
+        """
+        while True:
+            old_word = self.word
+            changed = self.poll()
+            if changed:
+                for name, mask, shift in STATUS_MASKS:
+                    if changed & mask:
+                        yield name, field_val(self.word, mask, shift), field_val(old_word, mask, shift)
+            if period > 0:
+                time.sleep(period)
+
+    def start(self, period=0.0):
+        """
+        Start polling in background thread every period seconds
+        """
+        if self.thread is not None:
+            return
+        self.running = True
+        self.thread = threading.Thread(target=self.__worker, args=(period,))
+        self.thread.setDaemon(True)
+        self.thread.start()
+
+    def stop(self):
+        """
+        Stop polling
+        """
+        self.running = False
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+    def __update_mask(self):
+        mask = 0
+        for m, f in self.sub_list:
+            mask |= m
+        self.mask = mask
+
+    def __dispatch(self, changed, word, old_word):
+        for name, mask, shift in STATUS_MASKS:
+            if not changed & mask:
+                continue
+            val = field_val(word, mask, shift)
+            old_val = field_val(old_word, mask, shift)
+            for sub_mask, func in self.sub_list:
+                if sub_mask & mask:
+                    try:
+                        func(name, val, old_val)
+                    except Exception:
+                        self.callback_errors += 1
+                        print >> sys.stderr, "WARNING: status callback for '%s' failed"%(name,)
+                        traceback.print_exc()
+
+    def __worker(self, period):
+        while self.running:
+            try:
+                self.poll()
+            except (IOError, ValueError):
+                self.bad_count += 1
+            if period > 0:
+                time.sleep(period)
+
+def field_val(word, mask, shift):
+    """
+    Returns value of status field as bool for single bits and as a
+    list of bools, as in get_status, for multi-bit fields.
+    """
+    val = (word & mask) >> shift
+    if mask >> shift == 1:
+        return bool(val)
+    nbits = len(bin(mask >> shift)) - 2
+    return [bool(val & (1<<i)) for i in range(nbits)]
+
+def status_dtype():
+    """
+    Returns numpy structured dtype with one field per status field,
+    bool for single bits and uint8 for multi-bit fields.
+    """
+    dtype_list = []
+    for name, shift, nbits in STATUS_FIELDS:
+        if nbits == 1:
+            dtype_list.append((name, numpy.bool_))
+        else:
+            dtype_list.append((name, numpy.uint8))
+    return numpy.dtype(dtype_list)
+
+def decode_status_array(words):
+    """
+    Decode array of raw 32 bit status words. Returns structured array
+    with one field per status field, e.g.
+
+      status = decode_status_array(words)
+      fault_index = numpy.nonzero(status['rms fault'])
+    """
+    if numpy is None:
+        raise ImportError, 'decode_status_array requires numpy'
+    words = numpy.asarray(words).astype(numpy.uint32)
+    status = numpy.empty(words.shape, dtype=status_dtype())
+    for name, shift, nbits in STATUS_FIELDS:
+        status[name] = (words >> shift) & ((1 << nbits) - 1)
+    return status
@@ -0,0 +1,179 @@
+"""
+-----------------------------------------------------------------------
+pyBAI
+Copyright (C) William Dickson, 2008.
+
+wbd@caltech.edu
+www.willdickson.com
+
+Released under the LGPL Licence, Version 3
+
+This file is part of pyBAI.
+
+pyBAI is free software: you can redistribute it and/or modify it
+under the terms of the GNU Lesser General Public License as published
+by the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+pyBAI is distributed in the hope that it will be useful, but
+WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public
+License along with pyBAI.  If not, see <http://www.gnu.org/licenses/>.
+
+------------------------------------------------------------------------
+
+Purpose: Provides high rate streaming of axis position into a NumPy
+ring buffer. Requires numpy.
+
+Example:
+
+  stream = PositionStream(BAI(baudrate=38400), size=100000)
+  stream.start()
+  ...
+  t, pos, valid = stream.latest(1000)
+  stream.stop()
+
+Author: William Dickson
+
+------------------------------------------------------------------------
+"""
+import ctypes
+import ctypes.util
+import os
+import threading
+import time
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# Constants
+DFLT_SIZE = 100000
+CLOCK_MONOTONIC = 1  # Linux clock id
+
+class PositionStream:
+
+    """
+    Polls axis position back to back in a background thread and writes
+    (host monotonic time, position, valid) samples into preallocated
+    ring buffers. Bad replies are stored with valid = False rather than
+    as a zero position.
+
+    Each sample is written twice, at i and i + size, so that the
+    latest n samples are always contiguous and latest() can return
+    views into the buffers without copying.
+    """
+
+    def __init__(self, dev, size=DFLT_SIZE, address=None):
+        if numpy is None:
+            raise ImportError, 'PositionStream requires numpy'
+        self.dev = dev
+        self.size = size
+        self.address = address
+        self.t = numpy.zeros((2*size,), dtype=numpy.float64)
+        self.pos = numpy.zeros((2*size,), dtype=numpy.int32)
+        self.valid = numpy.zeros((2*size,), dtype=numpy.bool_)
+        self.count = 0
+        self.bad_count = 0
+        self.thread = None
+        self.running = False
+
+    def start(self):
+        """
+        Start polling position in background thread
+        """
+        if self.thread is not None:
+            return
+        self.running = True
+        self.thread = threading.Thread(target=self.__worker)
+        self.thread.setDaemon(True)
+        self.thread.start()
+
+    def stop(self):
+        """
+        Stop polling position
+        """
+        self.running = False
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+    def latest(self, n=None):
+        """
+        Returns views (t, pos, valid) of the latest n samples, oldest
+        first. If n is None all samples in the buffer are returned. The
+        views are overwritten as new samples arrive, copy them if they
+        need to be kept.
+        """
+        count = self.count
+        nmax = min(count, self.size)
+        if n is None or n > nmax:
+            n = nmax
+        end = count%self.size + self.size
+        return self.t[end-n:end], self.pos[end-n:end], self.valid[end-n:end]
+
+    def rate(self):
+        """
+        Returns mean sample rate over the samples in the buffer
+        """
+        t, pos, valid = self.latest()
+        if len(t) < 2 or t[-1] == t[0]:
+            return 0.0
+        return (len(t) - 1)/(t[-1] - t[0])
+
+    def __worker(self):
+        dev = self.dev
+        address = self.address
+        while self.running:
+            t = monotonic()
+            try:
+                pos = dev.get_position(address=address, strict=True)
+                valid = True
+            except (IOError, ValueError):
+                pos = 0
+                valid = False
+                self.bad_count += 1
+            self.__append(t, pos, valid)
+
+    def __append(self, t, pos, valid):
+        i = self.count%self.size
+        j = i + self.size
+        self.t[i] = self.t[j] = t
+        self.pos[i] = self.pos[j] = pos
+        self.valid[i] = self.valid[j] = valid
+        self.count += 1
+
+# ---------------------------------------------------------------
+class timespec(ctypes.Structure):
+    _fields_ = [('tv_sec', ctypes.c_long), ('tv_nsec', ctypes.c_long)]
+
+def load_clock_gettime():
+    """
+    Returns libc clock_gettime function or None if it isn't available
+    """
+    if os.name != 'posix':
+        return None
+    try:
+        lib = ctypes.CDLL(ctypes.util.find_library('rt') or ctypes.util.find_library('c'), use_errno=True)
+        func = lib.clock_gettime
+    except (OSError, AttributeError):
+        return None
+    func.argtypes = [ctypes.c_int, ctypes.POINTER(timespec)]
+    return func
+
+CLOCK_GETTIME = load_clock_gettime()
+
+def monotonic():
+    """
+    Returns host monotonic clock time in seconds. Falls back to
+    time.time() if there is no monotonic clock.
+    """
+    if CLOCK_GETTIME is None:
+        return time.time()
+    ts = timespec()
+    if CLOCK_GETTIME(CLOCK_MONOTONIC, ctypes.pointer(ts)) != 0:
+        return time.time()
+    return ts.tv_sec + ts.tv_nsec*1.0e-9
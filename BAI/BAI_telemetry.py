@@ -0,0 +1,255 @@
+"""
+-----------------------------------------------------------------------
+pyBAI
+Copyright (C) William Dickson, 2008.
+
+wbd@caltech.edu
+www.willdickson.com
+
+Released under the LGPL Licence, Version 3
+
+This file is part of pyBAI.
+
+pyBAI is free software: you can redistribute it and/or modify it
+under the terms of the GNU Lesser General Public License as published
+by the Free Software Foundation, either version 3 of the License, or
+(at your option) any later version.
+
+pyBAI is distributed in the hope that it will be useful, but
+WITHOUT ANY WARRANTY; without even the implied warranty of
+MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the GNU
+Lesser General Public License for more details.
+
+You should have received a copy of the GNU Lesser General Public
+License along with pyBAI.  If not, see <http://www.gnu.org/licenses/>.
+
+------------------------------------------------------------------------
+
+Purpose: Provides recording of position and status telemetry to a
+memory-mapped binary file and a reader for such files.
+
+File layout: a HEADER_SIZE byte header followed by fixed size records.
+
+  header - magic, version, record size, capacity, record count and
+           wall clock start time (HEADER_FMT, little endian)
+  record - time (s), drive address, raw status word and position
+           (RECORD_FMT, little endian)
+
+Record times are wall clock times taken from the monotonic clock, so
+they never go backwards and the time index can be searched by bisection.
+The reader requires numpy, the recorder doesn't.
+
+Example:
+
+  rec = TelemetryRecorder(BAI(baudrate=38400), 'run.tlm', capacity=10**7)
+  rec.start()
+  ...
+  rec.close()
+
+  tlm = TelemetryReader('run.tlm')
+  rec_view = tlm.between(t0, t1)
+  print rec_view['position']
+
+Author: William Dickson
+
+------------------------------------------------------------------------
+"""
+import mmap
+import struct
+import threading
+import time
+import BAI_stream
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+# Constants
+MAGIC = 'BAITLM\x00\x01'
+VERSION = 1
+HEADER_FMT = '<8sIIQQd'
+HEADER_SIZE = 64
+COUNT_OFFSET = struct.calcsize('<8sIIQ')
+RECORD_FMT = '<dc3xIi'
+RECORD_SIZE = struct.calcsize(RECORD_FMT)
+DFLT_CAPACITY = 1000000
+
+if numpy is not None:
+    RECORD_DTYPE = numpy.dtype([
+        ('t', '<f8'),
+        ('address', 'S1'),
+        ('pad', 'V3'),
+        ('status', '<u4'),
+        ('position', '<i4'),
+        ])
+
+class TelemetryRecorder:
+
+    """
+    Polls status and position from the drives in address_list in a
+    background thread and appends them as records to a preallocated
+    memory-mapped file. Recording stops when the file holds capacity
+    records.
+    """
+
+    def __init__(self, dev, filename, capacity=DFLT_CAPACITY, address_list=None, period=0.0):
+        self.dev = dev
+        self.filename = filename
+        self.capacity = capacity
+        if address_list is None:
+            address_list = [dev.address]
+        self.address_list = address_list
+        self.period = period
+        self.count = 0
+        self.bad_count = 0
+        self.thread = None
+        self.running = False
+
+        # Preallocate file and write header
+        self.fid = open(filename, 'w+b')
+        self.fid.truncate(HEADER_SIZE + capacity*RECORD_SIZE)
+        self.map = mmap.mmap(self.fid.fileno(), HEADER_SIZE + capacity*RECORD_SIZE)
+        self.wall0 = time.time()
+        self.mono0 = BAI_stream.monotonic()
+        struct.pack_into(HEADER_FMT, self.map, 0, MAGIC, VERSION, RECORD_SIZE,
+                         capacity, 0, self.wall0)
+
+    def start(self):
+        """
+        Start recording in background thread
+        """
+        if self.thread is not None:
+            return
+        self.running = True
+        self.thread = threading.Thread(target=self.__worker)
+        self.thread.setDaemon(True)
+        self.thread.start()
+
+    def stop(self):
+        """
+        Stop recording
+        """
+        self.running = False
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+
+    def close(self):
+        """
+        Stop recording, flush and close file
+        """
+        self.stop()
+        self.map.flush()
+        self.map.close()
+        self.fid.close()
+
+    def full(self):
+        return self.count >= self.capacity
+
+    def record(self, address, status, position, t=None):
+        """
+        Append record to file. Returns False if the file is full.
+        """
+        if self.count >= self.capacity:
+            return False
+        if t is None:
+            t = self.__now()
+        offset = HEADER_SIZE + self.count*RECORD_SIZE
+        struct.pack_into(RECORD_FMT, self.map, offset, t, address, status & 0xffffffff, position)
+        # Count is updated after the record so readers never see a
+        # partial record
+        self.count += 1
+        struct.pack_into('<Q', self.map, COUNT_OFFSET, self.count)
+        return True
+
+    def __now(self):
+        return self.wall0 + (BAI_stream.monotonic() - self.mono0)
+
+    def __worker(self):
+        dev = self.dev
+        while self.running and not self.full():
+            for address in self.address_list:
+                t = self.__now()
+                try:
+                    status = dev.get_status_word(address=address)
+                    position = dev.get_position(address=address, strict=True)
+                except (IOError, ValueError):
+                    self.bad_count += 1
+                    continue
+                self.record(address, status, position, t=t)
+            if self.period > 0:
+                time.sleep(self.period)
+        self.running = False
+
+class TelemetryReader:
+
+    """
+    Memory-maps a telemetry file. Records are returned as views of
+    the file, nothing is read until it is used.
+    """
+
+    def __init__(self, filename):
+        if numpy is None:
+            raise ImportError, 'TelemetryReader requires numpy'
+        self.filename = filename
+        self.refresh()
+
+    def refresh(self):
+        """
+        Re-read header, picking up records appended since the file was
+        opened.
+        """
+        fid = open(self.filename, 'rb')
+        header = fid.read(HEADER_SIZE)
+        fid.close()
+        if len(header) < HEADER_SIZE:
+            raise ValueError, 'telemetry file header too short'
+        magic, version, record_size, capacity, count, wall0 = struct.unpack_from(HEADER_FMT, header)
+        if magic != MAGIC:
+            raise ValueError, 'not a telemetry file'
+        if version != VERSION or record_size != RECORD_SIZE:
+            raise ValueError, 'unsupported telemetry file version %d'%(version,)
+        self.capacity = capacity
+        self.count = count
+        self.start_time = wall0
+        if count == 0:
+            self.records = numpy.zeros((0,), dtype=RECORD_DTYPE)
+        else:
+            self.records = numpy.memmap(self.filename, dtype=RECORD_DTYPE, mode='r',
+                                        offset=HEADER_SIZE, shape=(count,))
+
+    def __len__(self):
+        return self.count
+
+    def __getitem__(self, key):
+        return self.records[key]
+
+    def t(self):
+        return self.records['t']
+
+    def status(self):
+        return self.records['status']
+
+    def position(self):
+        return self.records['position']
+
+    def address(self):
+        return self.records['address']
+
+    def seek(self, t):
+        """
+        Returns index of first record at or after time t
+        """
+        return int(numpy.searchsorted(self.records['t'], t, side='left'))
+
+    def between(self, t0, t1):
+        """
+        Returns view of records with t0 <= t < t1
+        """
+        return self.records[self.seek(t0):self.seek(t1)]
+
+    def for_address(self, address):
+        """
+        Returns records for drive address (a copy)
+        """
+        return self.records[self.records['address'] == address]
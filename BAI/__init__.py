@@ -28,3 +28,16 @@ License along with pyBAI.  If not, see <http://www.gnu.org/licenses/>.
 """
 from BAI import *
 from cmd_line import cmd_line_main
+from BAI_async import AsyncBAI, AsyncLoop
+from BAI_bus import BusScheduler
+from BAI_fleet import Fleet
+
+# Not imported here to keep start up fast, as they pull in numpy or
+# other modules the command line doesn't need. Import them directly,
+# e.g. from BAI.BAI_sim import SimBAI.
+#
+#   BAI_sim        SimBAI
+#   BAI_snapshot   SnapshotStore
+#   BAI_status     decode_status_array, StatusMonitor
+#   BAI_stream     PositionStream
+#   BAI_telemetry  TelemetryRecorder, TelemetryReader
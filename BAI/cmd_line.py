@@ -33,12 +33,16 @@ Author: William Dickson
 ------------------------------------------------------------------------
 """
 import BAI
+import BAI_cache
+import BAI_catalog
+import BAI_daemon
 import BAI_data
 import atexit
 import optparse
 import ConfigParser
 import os
 import os.path
+import shlex
 import sys
 
 class BAI_Cmd_Line:
@@ -47,9 +51,10 @@ class BAI_Cmd_Line:
     Command line interface
     """
 
-    def __init__(self):
+    def __init__(self, argv=None, progname=None, connect=True):
     
         self.cmd_table = {
+            'batch'            : self.batch,
             'default-to-file'  : self.default_to_file,
             'find-baudrate'    : self.find_baudrate,
             'help'             : self.help,
@@ -61,12 +66,14 @@ class BAI_Cmd_Line:
             'save-to-flash'    : self.save_to_flash,
             'set-baudrate'     : self.set_baudrate,
             'status'           : self.print_status,
+            'sync-from-file'   : self.sync_from_file,
             'toggle-mode'      : self.toggle_mode,
             'write-param'      : self.write_param,
             'get-pos'          : self.get_pos,
             }
 
         self.help_table = {
+            'batch'            : BAI_Cmd_Line.batch_help,
             'default-to-file'  : BAI_Cmd_Line.default_to_file_help,
             'find-baudrate'    : BAI_Cmd_Line.find_baudrate_help,
             'help'             : BAI_Cmd_Line.help_help,
@@ -78,28 +85,81 @@ class BAI_Cmd_Line:
             'save-to-flash'    : BAI_Cmd_Line.save_to_flash_help,
             'set-baudrate'     : BAI_Cmd_Line.set_baudrate_help,
             'status'           : BAI_Cmd_Line.status_help,
+            'sync-from-file'   : BAI_Cmd_Line.sync_from_file_help,
             'toggle-mode'      : BAI_Cmd_Line.toggle_mode_help,
             'write-param'      : BAI_Cmd_Line.write_param_help,
             'get-pos'          : BAI_Cmd_Line.get_pos_help,
             }
 
-        self.progname = os.path.split(sys.argv[0])[1]
+        if progname is None:
+            progname = os.path.split(sys.argv[0])[1]
+        self.progname = progname
 
         # Parse options from command line, options file, and .bai_options file
         self.options_dflt = BAI_Cmd_Line.options_default
-        self.options_cmd, self.args, self.parser = self.parse_cmd_options()
+        self.options_cmd, self.args, self.parser = self.parse_cmd_options(argv)
         self.options_file = self.parse_options_file(self.options_cmd)
         self.options_home = self.parse_options_home()
         self.merge_options()
 
-        # Create device
-        self.dev = BAI.BAI(address = self.options['address'],
-                           port = self.options['port'],
-                           timeout = self.options['timeout'],
-                           baudrate = self.options['baudrate'])        
+        # Create device. If connect is False the device must be given
+        # later using attach, e.g. by the bai daemon.
+        self.dev = None
+        if connect == True:
+            self.connect()
 
+    def connect(self):
+        """
+        Create device from options, closed at exit
+        """
+        # Show options and source
+        if self.options['verbose'] == True:
+            self.print_options()
+        self.dev = self.create_dev()
         atexit.register(self.atexit)
 
+    def create_dev(self):
+        """
+        Create BAI device from options
+        """
+        # Connection cache
+        if self.options['cache'] == True:
+            cache = BAI_cache.ConnCache()
+        else:
+            cache = None
+
+        dev = BAI.BAI(address = self.options['address'],
+                      port = self.options['port'],
+                      timeout = self.options['timeout'],
+                      baudrate = self.options['baudrate'],
+                      cache = cache)        
+
+        # Use cached baud rate unless given explicitly
+        if self.options_tagged['baudrate'][1] == 'default':
+            if dev.apply_cache():
+                self.options['baudrate'] = dev.comm.getBaudrate()
+        return dev
+
+    def attach(self, dev):
+        """
+        Use an already open BAI device. Baud rate, address and timeout
+        options given explicitly are applied to the device, otherwise
+        the device's current settings are kept.
+        """
+        if self.options['verbose'] == True:
+            self.print_options()
+        if self.options_tagged['baudrate'][1] == 'default':
+            self.options['baudrate'] = dev.comm.getBaudrate()
+        elif dev.comm.getBaudrate() != self.options['baudrate']:
+            dev.comm.setBaudrate(self.options['baudrate'])
+        if self.options_tagged['address'][1] == 'default':
+            self.options['address'] = dev.address
+        else:
+            dev.address = self.options['address']
+        if dev.comm.getTimeout() != self.options['timeout']:
+            dev.comm.setTimeout(self.options['timeout'])
+        self.dev = dev
+
     def atexit(self):
         try:
             self.dev.close()
@@ -174,10 +234,6 @@ class BAI_Cmd_Line:
         # Untag options
         self.options = untag_dict(self.options_tagged)
         
-        # Show options and source
-        if self.options['verbose'] == True:
-            self.print_options()
-        
 
     def parse_options_home(self):
         """
@@ -246,12 +302,12 @@ class BAI_Cmd_Line:
                 
         return options
                 
-    def parse_cmd_options(self):
+    def parse_cmd_options(self, argv=None):
         """
-        Parse command line options 
+        Parse command line options, argv defaults to sys.argv[1:]
         """
 
-        parser = optparse.OptionParser(usage=BAI_Cmd_Line.usage)
+        parser = optparse.OptionParser(usage=BAI_Cmd_Line.usage, prog=self.progname)
 
         parser.add_option('-v', '--verbose',
                                action='store_true',
@@ -283,13 +339,25 @@ class BAI_Cmd_Line:
                                help = 'set the serial port timeout seconds (float)',
                                default = None)
 
+        parser.add_option('-n', '--no-cache',
+                               action='store_false',
+                               dest = 'cache',
+                               help = "don't use the cached baud rate for the port",
+                               default = None)
+
         parser.add_option('-o', '--options',
                                type = BAI_Cmd_Line.options_type['options_file'],
                                dest = 'options_file',
                                help = 'set the configuration file',
                                default = None)
 
-        options, args = parser.parse_args()
+        parser.add_option('-d', '--no-daemon',
+                               action='store_true',
+                               dest = 'no_daemon',
+                               help = "don't forward the command to a running bai daemon",
+                               default = None)
+
+        options, args = parser.parse_args(argv)
 
         # Convert options to dictionary
         options = options.__dict__
@@ -353,6 +421,140 @@ class BAI_Cmd_Line:
     def get_pos(self):
         pos = self.dev.get_position()
         print pos
+
+    def batch(self):
+        """
+        Run commands read from a file, or stdin if the file is '-', over
+        the open connection. Adjacent read-param commands are pipelined.
+        Prints one tab separated result line per command.
+        """
+        if len(self.args) != 2:
+            print "ERROR: command 'batch' requires file name or '-' for stdin"
+            sys.exit(1)
+        filename = self.args[1]
+        if filename == '-':
+            fid = sys.stdin
+        else:
+            try:
+                fid = open(filename,'r')
+            except IOError:
+                print "ERROR: unable to open batch file '%s'"%(filename,)
+                sys.exit(1)
+
+        batch_table = {
+            'get-pos'       : self.batch_get_pos,
+            'reset'         : self.batch_reset,
+            'save-to-flash' : self.batch_save_to_flash,
+            'serial-poll'   : self.batch_serial_poll,
+            'status'        : self.batch_status,
+            'write-param'   : self.batch_write_param,
+            }
+
+        # Runs of read-param commands are collected and read together
+        read_list = []
+        error_count = 0
+        lineno = 0
+        while True:
+            line = fid.readline()
+            if not line:
+                break
+            lineno += 1
+            try:
+                arg_list = shlex.split(line, comments=True)
+            except ValueError, err:
+                print_batch_line(lineno, 'error', '', err)
+                error_count += 1
+                continue
+            if not arg_list:
+                continue
+            cmd_str, arg_list = arg_list[0], arg_list[1:]
+
+            if cmd_str == 'read-param':
+                # Bad arguments are reported in turn with the reads
+                try:
+                    if len(arg_list) != 1:
+                        raise ValueError, 'read-param requires parameter name or number'
+                    read_list.append((lineno, find_param(arg_list[0]), None))
+                except ValueError, err:
+                    read_list.append((lineno, None, err))
+                continue
+
+            error_count += self.batch_read_params(read_list)
+            read_list = []
+            try:
+                if not batch_table.has_key(cmd_str):
+                    raise ValueError, "command, '%s', not allowed in batch"%(cmd_str,)
+                result = batch_table[cmd_str](arg_list)
+                print_batch_line(lineno, 'ok', cmd_str, *result)
+            except Exception, err:
+                print_batch_line(lineno, 'error', cmd_str, err)
+                error_count += 1
+            sys.stdout.flush()
+
+        error_count += self.batch_read_params(read_list)
+        if fid != sys.stdin:
+            fid.close()
+        if error_count > 0:
+            sys.exit(1)
+
+    def batch_read_params(self, read_list):
+        """
+        Pipelined read of batch read-param commands, a list of (line
+        number, parameter, argument error) tuples. If the read fails the
+        parameters are read one at a time so that each error is
+        reported against its own command. Returns number of errors.
+        """
+        if not read_list:
+            return 0
+        address = self.options['address']
+        param_list = [param for lineno, param, arg_err in read_list if arg_err is None]
+        try:
+            val_dict = dict(zip(param_list, self.dev.read_params(param_list, address=address)))
+        except Exception:
+            val_dict = None
+        error_count = 0
+        for lineno, param, arg_err in read_list:
+            try:
+                if arg_err is not None:
+                    raise arg_err
+                num = BAI_data.PARAM_DICT[param]['num']
+                if val_dict is None:
+                    val = self.dev.read_param(param, address=address)
+                else:
+                    val = val_dict[param]
+                print_batch_line(lineno, 'ok', 'read-param', num, param, val)
+            except Exception, err:
+                print_batch_line(lineno, 'error', 'read-param', err)
+                error_count += 1
+        sys.stdout.flush()
+        return error_count
+
+    def batch_write_param(self, arg_list):
+        if len(arg_list) != 2:
+            raise ValueError, 'write-param requires parameter name/number and value'
+        address = self.options['address']
+        param = find_param(arg_list[0])
+        value = find_value(param, arg_list[1])
+        if param == 'baud rate':
+            self.dev.set_baudrate(value, address=address, save_and_reset=False)
+        else:
+            self.dev.write_param(param, value, address=address)
+        return BAI_data.PARAM_DICT[param]['num'], param, value
+
+    def batch_status(self, arg_list):
+        return (self.dev.get_status_word(address=self.options['address']),)
+
+    def batch_serial_poll(self, arg_list):
+        return (self.dev.get_serial_poll_word(address=self.options['address']),)
+
+    def batch_get_pos(self, arg_list):
+        return (self.dev.get_position(address=self.options['address'], strict=True),)
+
+    def batch_save_to_flash(self, arg_list):
+        return ('%1.3f'%(self.dev.save_to_flash(address=self.options['address']),),)
+
+    def batch_reset(self, arg_list):
+        return ('%1.3f'%(self.dev.reset(address=self.options['address']),),)
             
     def read_param(self):
         """
@@ -469,9 +671,40 @@ class BAI_Cmd_Line:
         except IOError, err:
             print "ERROR: unable to open file, %s"%(err,)
             sys.exit(1)
+        except ValueError, err:
+            # Bad parameter file
+            print "ERROR:", err
+            sys.exit(1)
         except Exception, err:
             print "ERROR:", err
                 
+    def sync_from_file(self):
+        """
+        Write only those parameters in the text file which differ from
+        the device's current values.
+        """
+        if len(self.args) != 2:
+            print "ERROR: command 'sync-from-file' requires input filename"
+            sys.exit(1)
+
+        filename = self.args[1]
+        address = self.options['address']
+        verbose = self.options['verbose']
+        try:
+            baudrate_flag, written, skipped = self.dev.sync_from_file(filename,
+                                                                      address=address,
+                                                                      verbose=verbose)
+        except IOError, err:
+            print "ERROR: unable to open file, %s"%(err,)
+            sys.exit(1)
+        except Exception, err:
+            print "ERROR:", err
+            sys.exit(1)
+        print 'wrote %d parameters, skipped %d unchanged'%(len(written),len(skipped))
+        if baudrate_flag == True:
+            print
+            print BAI_Cmd_Line.write_baudrate_msg
+
     def param_to_file(self):
         """
         Read all parameters from device and write the to text file.
@@ -523,7 +756,9 @@ class BAI_Cmd_Line:
         address = self.options['address']
         verbose = self.options['verbose']
         try:
-            self.dev.save_to_flash(address=address)
+            recovery_t = self.dev.save_to_flash(address=address)
+            if verbose == True:
+                print 'drive ready after %1.2f s'%(recovery_t,)
         except Exception, err:
             print "ERROR: saving parameters to flash"
             if verbose == True:
@@ -538,7 +773,12 @@ class BAI_Cmd_Line:
         print 
         verbose = self.options['verbose']
         try:
-            self.dev.toggle_mode()
+            recovery_t = self.dev.toggle_mode()
+            if verbose == True:
+                if recovery_t is None:
+                    print 'no reply from drive - in local mode'
+                else:
+                    print 'drive ready after %1.2f s'%(recovery_t,)
         except Exception, err:
             print "ERROR: toggling mode"
             if verbose == True:
@@ -551,7 +791,9 @@ class BAI_Cmd_Line:
         verbose = self.options['verbose']
         address = self.options['address']
         try:
-            self.dev.reset(address=address)
+            recovery_t = self.dev.reset(address=address)
+            if verbose == True:
+                print 'drive ready after %1.2f s'%(recovery_t,)
         except Exception, err:
             print "ERROR: reseting drive"
             if verbose == True:
@@ -584,7 +826,7 @@ class BAI_Cmd_Line:
         """
         verbose = self.options['verbose']
         address = self.options['address']
-        print 'Finding baudrate - this may take a while'
+        print 'Finding baudrate'
         flag, baudrate = self.dev.find_baudrate(address=address,verbose=verbose)
         
         if verbose == True:
@@ -592,6 +834,9 @@ class BAI_Cmd_Line:
 
         if flag==True:
             print 'baudrate = %d'%(baudrate,)
+            stored_baudrate = self.dev.get_stored_baudrate(address=address)
+            if stored_baudrate is not None and stored_baudrate != baudrate:
+                print 'baud rate parameter = %d (applies after reset)'%(stored_baudrate,)
         else:
             print "Cannot determine baudrate. The device may be in 'local' mode"
             print "which disables RS232 communications. Try toggling the device"
@@ -669,6 +914,7 @@ class BAI_Cmd_Line:
         'port'          : 'string',
         'timeout'       : 'float',
         'options_file'  : 'string',
+        'cache'         : 'boolean',
         '.bai_options'  : 'string',
         }
 
@@ -679,6 +925,8 @@ class BAI_Cmd_Line:
         'port'          : BAI.DFLT_PORT, 
         'timeout'       : BAI.DFLT_TIMEOUT,
         'options_file'  : None,
+        'cache'         : True,
+        'no_daemon'     : False,
         '.bai_options'  : False
         }
 
@@ -738,6 +986,7 @@ Commands:
    default-to-file   - write default parameters to file  
    param-to-file     - read all parameters from drive and write them to a file
    param-from-file   - read all parameters from file and write them to drive
+   sync-from-file    - write only parameters in file which differ from drive
  
  Serial communication
    find-baudrate     - try to determine the devices current baud rate 
@@ -745,11 +994,17 @@ Commands:
    set-baudrate      - set the device's baud rate
    toggle-mode       - toggle mode (local/remote)
   
+ Scripting
+   batch             - run commands from a file over one connection
+
  Help commands
    help              - get help  
 
  
 * To get help for a specific command type: %prog help COMMAND
+
+* If the bai daemon (bai-daemon) is running commands are forwarded to
+  it, use -d to access the drive directly.
 """
 
     reset_help = """\
@@ -909,6 +1164,23 @@ Examples:
  # Set drive parameters from file myparam.txt
  %prog param-from-file myparam.txt 
                                    
+"""
+    
+    sync_from_file_help = """\
+command: sync-from-file
+
+usage: %prog [options] sync-from-file FILENAME
+
+Read the values of the drive parameters from the input file, FILENAME,
+compare them with the drive's current values and write only those
+which differ. In verbose mode the parameters skipped and written are
+listed. Note, if the baud rate is changed a save-to-flash and a drive
+reset is required before this will take effect.
+
+Examples:
+
+ # Bring drive parameters into line with golden.txt
+ %prog sync-from-file golden.txt
 """
     
     find_baudrate_help = """\
@@ -966,6 +1238,35 @@ Examples:
  %prog help status  # prints help for the status command 
 """
 
+    batch_help = """\
+command: batch
+
+usage: %prog [options] batch FILE
+
+Runs the commands in FILE, or read from stdin if FILE is '-', over a
+single connection to the drive. One command per line, blank lines and
+text after '#' are ignored. The commands allowed are:
+
+  read-param PARAM, write-param PARAM VALUE, status, serial-poll,
+  get-pos, save-to-flash, reset
+
+Adjacent read-param commands are sent to the drive together. One tab
+separated line is printed per command:
+
+  LINE  ok     COMMAND  RESULT ...
+  LINE  error  COMMAND  MESSAGE
+
+where LINE is the line number in FILE. The results are:
+
+  read-param, write-param   number  name  value
+  status                    raw status word (int)
+  serial-poll               serial poll byte (int)
+  get-pos                   position
+  save-to-flash, reset      recovery time (s)
+
+The exit status is 1 if any command failed.
+"""
+
     get_pos_help = """\
 command: get-pos
 
@@ -998,14 +1299,25 @@ def check_if_file_exists(filename):
 def get_value_arg(param,arg):
     """
     Utility function which converts command line argument to parameter
-    value. Checking type ...
+    value. If not possible it prints the appropriate error message and
+    exits.
+    """
+    try:
+        return find_value(param,arg)
+    except ValueError, err:
+        print "ERROR: %s"%(err,)
+        sys.exit(1)
+
+def find_value(param,arg):
+    """
+    Converts command line argument to parameter value. Raises
+    ValueError if this isn't possible.
     """
     # Deal with negatives
     try:
         val_type = BAI_data.PARAM_DICT[param]['type']
-    except:
-        print "ERROR: uknown parameter, '%s'"%(param,)
-        sys.exit(1)
+    except KeyError:
+        raise ValueError, "uknown parameter, '%s'"%(param,)
     if val_type in (BAI_data.BAI_INT, BAI_data.BAI_FLOAT):
         if arg[0] == 'n':
             arg = '-%s'%(arg[1:],)
@@ -1013,14 +1325,9 @@ def get_value_arg(param,arg):
     # Cast value to approriate type
     try:
         val = cast_val(param,arg)
-    except KeyError:
-        print "ERROR: uknown parameter, '%s'"%(param,)
-        sys.exit(1)
     except ValueError:
-        val_type = BAI_data.PARAM_DICT[param]['type']
         val_type_str = BAI_data.BAI_TYPE_DICT[val_type]
-        print "ERROR: unable to cast parameter to type %s"%(val_type_str,)
-        sys.exit(1)
+        raise ValueError, "unable to cast parameter to type %s"%(val_type_str,)
 
 #    # Check ranges
 #    try:
@@ -1031,35 +1338,42 @@ def get_value_arg(param,arg):
 
     return val
         
-
 def get_param_arg(arg):
     """
     Utility function converts command line argument to parameter name
     if possible. If not it prints the appropriate error message and
     exits. 
     """
-    # Special cases allow 'baudrate' and 'baud rate'
-    if arg == 'baudrate':
-        arg = 'baud rate'
+    try:
+        return find_param(arg)
+    except ValueError, err:
+        print "ERROR: %s"%(err,)
+        sys.exit(1)
 
-    if BAI_data.PARAM_DICT.has_key(arg):
-        param = arg
-    else:
-        # Convert to integer
-        try:
-            num = int(arg)
-        except ValueError:
-            print "ERROR: parameter name not found and unable to convert to int"
-            sys.exit(1)
-            
-        # Get parameter name corresponding to integer
-        try:
-            param = BAI.num2param(num)
-        except KeyError:
-            print "ERROR: %d does not correspond to known parameter"%(num,)
-            sys.exit(1)
-    return param
+def find_param(arg):
+    """
+    Converts command line argument, parameter name or number, to
+    parameter name. Raises ValueError if this isn't possible.
+    """
+    # Names, aliases such as 'baudrate' and numbers
+    try:
+        return BAI_catalog.CATALOG.lookup(arg).name
+    except KeyError:
+        pass
+    try:
+        num = int(arg)
+    except ValueError:
+        raise ValueError, "parameter name not found and unable to convert to int"
+    raise ValueError, "%d does not correspond to known parameter"%(num,)
             
+def print_batch_line(lineno, result, cmd_str, *val_list):
+    """
+    Print tab separated batch result line
+    """
+    field_list = [str(lineno), result, cmd_str]
+    field_list.extend([str(val).replace('\t',' ').replace('\n',' ') for val in val_list])
+    print '\t'.join(field_list)
+
 def tag_dict(input_dict, string):
     """
     Tag dictionary value with string
@@ -1080,9 +1394,15 @@ def untag_dict(input_dict):
 
 def cmd_line_main():
     """
-    Command line interface entry point
+    Command line interface entry point. The command is forwarded to
+    the bai daemon if one is running, otherwise it is run directly.
     """
-    cmd_line = BAI_Cmd_Line()
+    cmd_line = BAI_Cmd_Line(connect=False)
+    if cmd_line.options['no_daemon'] == False:
+        rtn_code = BAI_daemon.forward(sys.argv[1:], cmd_line.progname)
+        if rtn_code is not None:
+            sys.exit(rtn_code)
+    cmd_line.connect()
     cmd_line.run()
     
 
@@ -0,0 +1,66 @@
+"""
+Micro-benchmark for building serial command frames. Compares the
+original character list + struct.pack implementation of create_cmd
+with the cached prefix version and the cached read parameter frames.
+
+usage: python bench_frames.py [-n COUNT]
+"""
+import optparse
+import struct
+import timeit
+import BAI
+
+DFLT_COUNT = 200000
+
+def create_cmd_legacy(address, cmd_chrs, arg_list=()):
+    """
+    Original create_cmd implementation, kept here for comparison
+    """
+    cmd_list = []
+    cmd_list.extend(BAI.START_CHRS)
+    if address:
+        if not len(address) == 1:
+            raise ValueError, 'address must have length = 1'
+        cmd_list.append(address)
+    cmd_list.extend([c for c in cmd_chrs])
+    for arg in arg_list:
+        cmd_list.append(' ')
+        cmd_list.extend([c for c in str(arg)])
+    cmd_list.extend(BAI.STOP_CHRS)
+    cmd = struct.pack('c'*len(cmd_list),*cmd_list)
+    return cmd
+
+def frames_per_s(func, count):
+    t = min(timeit.repeat(func, number=count, repeat=3))
+    return count/t
+
+def main():
+    parser = optparse.OptionParser(usage='%prog [options]')
+    parser.add_option('-n', '--count', type='int', dest='count', default=DFLT_COUNT,
+                      help='number of frames to build per run')
+    options, args = parser.parse_args()
+    n = options.count
+
+    # Sanity check - both implementations must give the same frames
+    for cmd_args in (('A','PS',()), ('A','PX',()), ('A','RP',(12,)), ('B','WP',(0,750000)), (None,chr(1),())):
+        assert BAI.create_cmd(*cmd_args) == create_cmd_legacy(*cmd_args)
+
+    bench_list = [
+        ('PS legacy',      lambda : create_cmd_legacy('A', 'PS', ())),
+        ('PS cached',      lambda : BAI.create_cmd('A', 'PS', ())),
+        ('RP 12 legacy',   lambda : create_cmd_legacy('A', 'RP', (12,))),
+        ('RP 12 cached',   lambda : BAI.create_cmd('A', 'RP', (12,))),
+        ('RP 12 prebuilt', lambda : BAI.create_read_cmd('A', 12)),
+        ('WP legacy',      lambda : create_cmd_legacy('A', 'WP', (0, 750000))),
+        ('WP cached',      lambda : BAI.create_cmd('A', 'WP', (0, 750000))),
+        ]
+
+    print
+    print 'frame              frames/s'
+    print '-'*30
+    for name, func in bench_list:
+        print '%-16s %10.0f'%(name, frames_per_s(func, n))
+    print
+
+if __name__ == '__main__':
+    main()
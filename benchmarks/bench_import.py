@@ -0,0 +1,94 @@
+"""
+Start up benchmark. Times importing the BAI package, and BAI_data on
+its own, in fresh interpreters and checks which slow or optional
+modules were loaded.
+
+Exits with status 1 if importing the BAI package takes longer than the
+limit (median, in ms) or loads any of the modules in SLOW_MODULES, so
+it can be used to catch start up regressions.
+
+usage: python bench_import.py [-n COUNT] [-l LIMIT]
+"""
+import optparse
+import os
+import subprocess
+import sys
+
+DFLT_COUNT = 20
+DFLT_LIMIT = 90.0
+
+# Modules which importing the BAI package must not load
+SLOW_MODULES = ['numpy', 'BAI_doc', 'BAI_sim', 'BAI_snapshot', 'BAI_status',
+                'BAI_stream', 'BAI_telemetry']
+
+IMPORT_SCRIPT = """\
+import sys, time
+t0 = time.time()
+import %s
+t1 = time.time()
+loaded = [m for m in %r if m in sys.modules or 'BAI.' + m in sys.modules]
+print '%%f %%s' %% (t1 - t0, ','.join(loaded) or '-')
+"""
+
+def time_import(module, count, path):
+    """
+    Returns list of import times and list of slow modules loaded
+    """
+    env = dict(os.environ)
+    env['PYTHONPATH'] = os.pathsep.join([path, env.get('PYTHONPATH', '')])
+    t_list = []
+    loaded_list = []
+    for i in range(count):
+        output = subprocess.Popen([sys.executable, '-c', IMPORT_SCRIPT%(module, SLOW_MODULES)],
+                                  stdout=subprocess.PIPE, env=env).communicate()[0]
+        t, loaded = output.split()
+        t_list.append(float(t))
+        for m in loaded.split(','):
+            if m != '-' and not m in loaded_list:
+                loaded_list.append(m)
+    return t_list, loaded_list
+
+def main():
+    parser = optparse.OptionParser(usage='%prog [options]')
+    parser.add_option('-n', '--count', type='int', dest='count', default=DFLT_COUNT,
+                      help='number of interpreters to start per module')
+    parser.add_option('-l', '--limit', type='float', dest='limit', default=DFLT_LIMIT,
+                      help='maximum median BAI package import time in ms (default %1.0f)'%(DFLT_LIMIT,))
+    options, args = parser.parse_args()
+
+    root_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    pkg_dir = os.path.join(root_dir, 'BAI')
+    bench_list = [
+        ('BAI_data', pkg_dir),
+        ('BAI_doc', pkg_dir),
+        ('BAI', root_dir),
+        ]
+
+    print
+    print 'module        min (ms)   median (ms)   slow modules loaded'
+    print '-'*60
+    result_dict = {}
+    for module, path in bench_list:
+        t_list, loaded_list = time_import(module, options.count, path)
+        t_list.sort()
+        median_t = 1.0e3*t_list[len(t_list)/2]
+        result_dict[module] = (median_t, loaded_list)
+        print '%-12s %9.2f %13.2f   %s'%(module, 1.0e3*t_list[0], median_t,
+                                         ', '.join(loaded_list) or '-')
+    print
+
+    # Check BAI package import for regressions
+    median_t, loaded_list = result_dict['BAI']
+    failed = False
+    if median_t > options.limit:
+        print 'FAIL: BAI import %1.2f ms > limit %1.2f ms'%(median_t, options.limit)
+        failed = True
+    if loaded_list:
+        print 'FAIL: BAI import loads %s'%(', '.join(loaded_list),)
+        failed = True
+    if failed:
+        sys.exit(1)
+    print 'OK'
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,183 @@
+"""
+Throughput and latency benchmarks for the BAI protocol layer. Runs
+against a SimBAI virtual drive at each allowed baud rate and writes
+the results as JSON.
+
+usage: python bench_protocol.py [-n COUNT] [-o OUTPUT] [-b BAUDRATE]
+
+Each result gives commands per second, p50/p95/p99 latency and the
+efficiency, which is the theoretical wire time of the frames sent and
+received divided by the measured time.
+"""
+import json
+import optparse
+import os
+import sys
+import tempfile
+import time
+import BAI
+from BAI import BAI_data
+from BAI import BAI_sim
+
+DFLT_COUNT = 50
+DFLT_OUTPUT = 'bench_protocol.json'
+
+def percentile(t_list, p):
+    """
+    Nearest rank percentile of list of times
+    """
+    t_list = sorted(t_list)
+    n = int(round(p/100.0*(len(t_list)-1)))
+    return t_list[n]
+
+def read_frame_len(param):
+    """
+    Number of chrs sent and received reading parameter
+    """
+    num = BAI_data.PARAM_DICT[param]['num']
+    cmd = BAI.create_cmd(BAI.DFLT_ADDRESS, 'RP', (num,))
+    val = BAI_data.PARAM_DICT[param]['default']
+    val = BAI.cast_val(param, val)
+    return len(cmd) + len(BAI.START_CHRS) + 1 + len(str(val)) + len(BAI.STOP_CHRS)
+
+def write_frame_len(param):
+    """
+    Number of chrs sent and received writing parameter
+    """
+    num = BAI_data.PARAM_DICT[param]['num']
+    val = BAI.cast_val(param, BAI_data.PARAM_DICT[param]['default'])
+    cmd = BAI.create_cmd(BAI.DFLT_ADDRESS, 'WP', (num, val))
+    return len(cmd) + BAI.WRITE_RETURN_NCHAR
+
+def status_frame_len(cmd_chrs, val):
+    cmd = BAI.create_cmd(BAI.DFLT_ADDRESS, cmd_chrs, ())
+    return len(cmd) + len(BAI.START_CHRS) + 1 + len(str(val)) + len(BAI.STOP_CHRS)
+
+def time_op(func, count):
+    """
+    Call function count times and return list of call times
+    """
+    t_list = []
+    for i in range(count):
+        t0 = time.time()
+        func()
+        t_list.append(time.time() - t0)
+    return t_list
+
+def make_result(op, baudrate, t_list, nchar):
+    wire_t = BAI_sim.wire_time(nchar, baudrate)
+    mean_t = sum(t_list)/len(t_list)
+    return {
+        'op' : op,
+        'baudrate' : baudrate,
+        'count' : len(t_list),
+        'cmds_per_s' : 1.0/mean_t,
+        'mean' : mean_t,
+        'p50' : percentile(t_list, 50),
+        'p95' : percentile(t_list, 95),
+        'p99' : percentile(t_list, 99),
+        'wire_time' : wire_t,
+        'efficiency' : wire_t/mean_t,
+        }
+
+def bench_baudrate(baudrate, count):
+    """
+    Run benchmarks at a single baud rate
+    """
+    sim = BAI_sim.SimBAI(baudrate=baudrate)
+    sim.start()
+    dev = BAI.BAI(port=sim.port, baudrate=baudrate)
+    tmp_dir = tempfile.mkdtemp()
+    param_file = os.path.join(tmp_dir, 'param.txt')
+
+    all_read_len = sum([read_frame_len(p) for p in BAI_data.PARAM_LIST])
+    all_write_len = sum([write_frame_len(p) for p in BAI_data.PARAM_LIST])
+    pos_len = status_frame_len('PX', sim.position)
+    status_len = status_frame_len('PS', sim.status)
+
+    result_list = []
+    try:
+        t_list = time_op(lambda : dev.read_param('KP'), count)
+        result_list.append(make_result('read_param', baudrate, t_list, read_frame_len('KP')))
+
+        t_list = time_op(lambda : dev.write_param('KP', 750000), count)
+        result_list.append(make_result('write_param', baudrate, t_list, write_frame_len('KP')))
+
+        t_list = time_op(lambda : dev.get_status(), count)
+        result_list.append(make_result('get_status', baudrate, t_list, status_len))
+
+        t_list = time_op(lambda : dev.get_position(), count)
+        result_list.append(make_result('get_position', baudrate, t_list, pos_len))
+
+        # Bulk operations - these are slow at low baud rates so only
+        # run them a few times.
+        bulk_count = max(1, count/25)
+        stdout = sys.stdout
+        sys.stdout = open(os.devnull, 'w')
+        try:
+            t_list = time_op(lambda : dev.print_param(), bulk_count)
+        finally:
+            sys.stdout.close()
+            sys.stdout = stdout
+        result_list.append(make_result('print_param', baudrate, t_list, all_read_len))
+
+        t_list = time_op(lambda : dev.param_to_file(param_file), bulk_count)
+        result_list.append(make_result('param_to_file', baudrate, t_list, all_read_len))
+
+        t_list = time_op(lambda : dev.param_from_file(param_file), bulk_count)
+        result_list.append(make_result('param_from_file', baudrate, t_list, all_write_len))
+    finally:
+        dev.close()
+        sim.stop()
+        if os.path.exists(param_file):
+            os.remove(param_file)
+        os.rmdir(tmp_dir)
+    return result_list
+
+def print_results(result_list):
+    print
+    print 'op                baud    cmd/s    p50(ms)  p95(ms)  p99(ms)  eff'
+    print '-'*70
+    for r in result_list:
+        print '%-16s %6d %8.1f %8.2f %8.2f %8.2f %5.2f'%(r['op'], r['baudrate'],
+                                                         r['cmds_per_s'],
+                                                         1.0e3*r['p50'],
+                                                         1.0e3*r['p95'],
+                                                         1.0e3*r['p99'],
+                                                         r['efficiency'])
+    print
+
+def main():
+    parser = optparse.OptionParser(usage='%prog [options]')
+    parser.add_option('-n', '--count', type='int', dest='count', default=DFLT_COUNT,
+                      help='number of times to run each single command')
+    parser.add_option('-o', '--output', type='string', dest='output', default=DFLT_OUTPUT,
+                      help='JSON output file')
+    parser.add_option('-b', '--baudrate', type='int', dest='baudrate', default=None,
+                      help='only run at this baud rate')
+    options, args = parser.parse_args()
+
+    if options.baudrate is None:
+        baudrates = BAI.allowed_baudrates()
+    else:
+        baudrates = (options.baudrate,)
+
+    result_list = []
+    for b in baudrates:
+        print 'running benchmarks at %d baud'%(b,)
+        result_list.extend(bench_baudrate(b, options.count))
+
+    print_results(result_list)
+    report = {
+        'timestamp' : time.time(),
+        'python' : sys.version.split()[0],
+        'count' : options.count,
+        'results' : result_list,
+        }
+    fid = open(options.output, 'w')
+    json.dump(report, fid, indent=2)
+    fid.close()
+    print 'results written to %s'%(options.output,)
+
+if __name__ == '__main__':
+    main()
@@ -33,5 +33,7 @@ setup(name='BAI',
       author='William Dickson',
       author_email='wbd@caltech.edu',
       packages=find_packages(),
-      entry_points = {'console_scripts': ['bai = BAI:cmd_line_main',]}
+      extras_require = {'numpy': ['numpy']},
+      entry_points = {'console_scripts': ['bai = BAI:cmd_line_main',
+                                          'bai-daemon = BAI.BAI_daemon:daemon_main',]}
      )
@@ -0,0 +1,64 @@
+"""
+Tests of AsyncBAI against the SimBAI virtual drive.
+
+usage: python -m unittest discover tests
+"""
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from BAI import AsyncBAI, AsyncLoop
+from BAI.BAI_sim import SimBAI
+
+class TestAsyncBAI(unittest.TestCase):
+
+    def setUp(self):
+        self.sim = SimBAI()
+        self.sim.start()
+        self.loop = AsyncLoop()
+        self.dev = AsyncBAI(port=self.sim.port, loop=self.loop)
+
+    def tearDown(self):
+        self.dev.close()
+        self.sim.stop()
+
+    def test_garbage_before_reply(self):
+        self.sim.ram['KP'] = 1234
+        os.write(self.sim.master, '\xff\xfe junk')
+        req = self.dev.read_param('KP')
+        self.assertEqual(self.loop.run_until_complete(req, timeout=5.0), 1234)
+        self.assertTrue(self.dev.reader.resync_count > 0)
+
+    def test_save_and_reset_recovery(self):
+        req_list = [self.dev.write_param('KI', 77),
+                    self.dev.save_to_flash(),
+                    self.dev.reset(),
+                    self.dev.read_param('KI')]
+        val_list = self.loop.run_until_complete(req_list, timeout=10.0)
+        self.assertTrue(val_list[1] >= self.sim.save_t)
+        self.assertTrue(val_list[2] >= self.sim.reset_t)
+        self.assertEqual(val_list[3], 77)
+
+    def test_late_reply(self):
+        # KI reply arrives after the read has timed out. It must not be
+        # taken as the reply to the KP read which follows.
+        self.sim.ram['KP'] = 1111
+        self.sim.ram['KI'] = 2222
+        self.sim.cmd_latency = 0.1
+        self.dev.timeout = 0.05
+        req = self.dev.read_param('KI')
+        self.assertRaises(IOError, self.loop.run_until_complete, req, 5.0)
+        self.sim.cmd_latency = 0.0
+        self.dev.timeout = 0.5
+        req = self.dev.read_param('KP')
+        self.assertEqual(self.loop.run_until_complete(req, timeout=5.0), 1111)
+
+    def test_no_recovery(self):
+        # Drive doesn't answer serial polls within RESET_SLEEP_T
+        self.sim.reset_t = 10.0
+        req = self.dev.reset()
+        self.assertRaises(IOError, self.loop.run_until_complete, req, 10.0)
+
+if __name__ == '__main__':
+    unittest.main()
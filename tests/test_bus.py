@@ -0,0 +1,74 @@
+"""
+Tests of the BusScheduler against the SimBAI virtual drive. The drive
+answers to address A only, so requests for B time out.
+
+usage: python -m unittest discover tests
+"""
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from BAI import BAI, BusScheduler
+from BAI.BAI_sim import SimBAI
+
+class TestBusScheduler(unittest.TestCase):
+
+    def setUp(self):
+        self.sim = SimBAI()
+        self.sim.start()
+        self.dev = BAI(port=self.sim.port, timeout=0.05)
+        self.bus = BusScheduler(self.dev)
+
+    def tearDown(self):
+        self.dev.close()
+        self.sim.stop()
+
+    def test_round_robin(self):
+        a_list = [self.bus.submit('A', 'get_status_word') for i in range(3)]
+        b_list = [self.bus.submit('B', 'get_status_word') for i in range(2)]
+        done_list = []
+        while self.bus.step():
+            req_list = [r for r in a_list + b_list if r.done() and not r in done_list]
+            done_list.extend(req_list)
+        self.assertEqual(done_list, [a_list[0], b_list[0], a_list[1], b_list[1], a_list[2]])
+        self.assertEqual(a_list[0].wait(), 0)
+        self.assertRaises(IOError, b_list[0].wait)
+        stats = self.bus.get_stats()
+        self.assertEqual(stats['A']['completed'], 3)
+        self.assertEqual(stats['B']['errors'], 2)
+
+    def test_pipelined_reads(self):
+        self.sim.ram['KP'] = 1234
+        self.sim.ram['KI'] = 56
+        self.dev.pipeline_depth = 4
+        req_list = [self.bus.submit('A', 'read_param', p) for p in ['KP', 'KI', 'KP']]
+        self.assertTrue(self.bus.step())
+        self.assertTrue(all([r.done() for r in req_list]))
+        self.assertFalse(self.bus.step())
+        self.assertEqual([r.wait() for r in req_list], [1234, 56, 1234])
+
+    def test_fallback(self):
+        # Bad reply fails the pipelined read, the requests are then
+        # read individually so the error ends up with its request
+        self.sim.ram['KP'] = 1234
+        self.sim.ram['KI'] = 'bad'
+        self.dev.pipeline_depth = 4
+        req_list = [self.bus.submit('A', 'read_param', p) for p in ['KP', 'KI', 'KPOS']]
+        self.bus.run_pending()
+        self.assertEqual(req_list[0].wait(), 1234)
+        self.assertRaises(ValueError, req_list[1].wait)
+        self.assertEqual(req_list[2].wait(), self.sim.ram['KPOS'])
+        stats = self.bus.get_stats()['A']
+        self.assertEqual((stats['completed'], stats['errors']), (2, 1))
+
+    def test_strict(self):
+        strict_req = self.bus.submit('B', 'get_position', strict=True)
+        req = self.bus.submit('B', 'get_position')
+        self.bus.run_pending()
+        self.assertRaises(IOError, strict_req.wait)
+        self.assertEqual(req.wait(), 0)
+        self.assertEqual(self.bus.get_stats()['B']['errors'], 2)
+
+if __name__ == '__main__':
+    unittest.main()
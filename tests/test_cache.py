@@ -0,0 +1,67 @@
+"""
+Tests of the connection cache file and its use by BAI against the
+SimBAI virtual drive.
+
+usage: python -m unittest discover tests
+"""
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from BAI import BAI
+from BAI import BAI_cache
+from BAI.BAI_sim import SimBAI
+
+class TestConnCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.filename = os.path.join(self.tmp_dir, BAI_cache.CACHE_FILE)
+        self.cache = BAI_cache.ConnCache(self.filename)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmp_dir)
+
+    def test_round_trip(self):
+        self.assertEqual(self.cache.get('/dev/ttyS0'), None)
+        self.cache.update('/dev/ttyS0', baudrate=38400, address='B',
+                          mode=BAI_cache.MODE_REMOTE)
+        self.cache.update('/dev/ttyS0', mode=BAI_cache.MODE_LOCAL)
+        entry = BAI_cache.ConnCache(self.filename).get('/dev/ttyS0')
+        self.assertEqual(entry, {'baudrate' : 38400, 'address' : 'B',
+                                 'mode' : BAI_cache.MODE_LOCAL})
+        self.cache.invalidate('/dev/ttyS0')
+        self.assertEqual(self.cache.get('/dev/ttyS0'), None)
+
+class TestApplyCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.cache = BAI_cache.ConnCache(os.path.join(self.tmp_dir, BAI_cache.CACHE_FILE))
+        self.sim = SimBAI(address='B', baudrate=19200)
+        self.sim.start()
+        self.dev = BAI(port=self.sim.port, cache=self.cache)
+
+    def tearDown(self):
+        self.dev.close()
+        self.sim.stop()
+        shutil.rmtree(self.tmp_dir)
+
+    def test_apply(self):
+        # Baud rate is applied, the device address isn't changed
+        self.cache.update(self.sim.port, baudrate=19200, address='B')
+        self.assertTrue(self.dev.apply_cache())
+        self.assertEqual(self.dev.comm.getBaudrate(), 19200)
+        self.assertEqual(self.dev.address, 'A')
+
+    def test_invalidate(self):
+        self.cache.update(self.sim.port, baudrate=38400, address='B')
+        self.assertFalse(self.dev.apply_cache())
+        self.assertEqual(self.dev.comm.getBaudrate(), 9600)
+        self.assertEqual(self.cache.get(self.sim.port), None)
+
+if __name__ == '__main__':
+    unittest.main()
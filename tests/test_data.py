@@ -0,0 +1,35 @@
+"""
+Tests that the lazily loaded parameter documentation in BAI_data can
+be used as before it was moved to BAI_doc.
+
+usage: python -m unittest discover tests
+"""
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from BAI import BAI_data
+from BAI import BAI_doc
+
+class TestParamDoc(unittest.TestCase):
+
+    def test_doc_constants(self):
+        self.assertEqual(BAI_data.KP_DOC_STR, BAI_doc.KP_DOC_STR)
+        from BAI.BAI_data import BAUD_RATE_DOC_STR
+        self.assertEqual(BAUD_RATE_DOC_STR, BAI_doc.BAUD_RATE_DOC_STR)
+        self.assertRaises(AttributeError, getattr, BAI_data, 'NOT_A_PARAM_DOC_STR')
+
+    def test_param_entry(self):
+        for param in BAI_data.PARAM_LIST:
+            entry = BAI_data.PARAM_DICT[param]
+            self.assertTrue('doc_str' in entry)
+            self.assertTrue(entry.has_key('units'))
+            self.assertTrue('doc_str' in entry.keys())
+            self.assertEqual(entry['doc_str'], BAI_doc.PARAM_DOC_DICT[param]['doc_str'])
+        entry = BAI_data.PARAM_DICT['baud rate']
+        self.assertEqual(entry.get('units'), 'bps')
+        self.assertEqual(dict(entry.items())['doc_str'], BAI_doc.BAUD_RATE_DOC_STR)
+
+if __name__ == '__main__':
+    unittest.main()
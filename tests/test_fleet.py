@@ -0,0 +1,49 @@
+"""
+Tests of the Fleet runner against SimBAI virtual drives.
+
+usage: python -m unittest discover tests
+"""
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from BAI import Fleet
+from BAI import BAI_fleet
+from BAI.BAI_sim import SimBAI
+
+class TestFleet(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        # Second drive isn't at the baud rate given in the inventory
+        self.sim_list = [SimBAI(), SimBAI(baudrate=19200)]
+        for sim in self.sim_list:
+            sim.start()
+        self.inventory = [(sim.port, 'A', 9600) for sim in self.sim_list]
+
+    def tearDown(self):
+        for sim in self.sim_list:
+            sim.stop()
+        shutil.rmtree(self.tmp_dir)
+
+    def test_param_to_file(self):
+        template = os.path.join(self.tmp_dir, 'cfg_100%_%(port)s_%(address)s.txt')
+        report = Fleet(self.inventory).run('param_to_file', template)
+        self.assertEqual([e['port'] for e in report], [sim.port for sim in self.sim_list])
+        self.assertTrue(report[0]['ok'])
+        self.assertEqual(report[0]['error'], None)
+        name = 'cfg_100%%_%s_A.txt'%(os.path.basename(self.sim_list[0].port),)
+        self.assertEqual(os.listdir(self.tmp_dir), [name])
+        self.assertFalse(report[1]['ok'])
+        self.assertTrue(isinstance(report[1]['error'], IOError))
+
+    def test_sub_arg(self):
+        subs = {'port' : 'ttyS0', 'address' : 'B'}
+        self.assertEqual(BAI_fleet.sub_arg('%d %(port)s%(address)s', subs), '%d ttyS0B')
+        self.assertEqual(BAI_fleet.sub_arg(5, subs), 5)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,130 @@
+"""
+Tests of the FrameReader resync and pipelined parameter reads against
+the SimBAI virtual drive.
+
+usage: python -m unittest discover tests
+"""
+import os
+import sys
+import unittest
+import serial
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from BAI import BAI
+from BAI import BAI_frame
+from BAI.BAI_sim import SimBAI
+
+START_STR = BAI_frame.START_STR
+STOP_STR = BAI_frame.STOP_STR
+
+class TestFrameReader(unittest.TestCase):
+
+    """
+    Raw chrs are written to the simulated drive's side of the pseudo
+    terminal, which isn't started, and read back through a FrameReader.
+    """
+
+    def setUp(self):
+        self.sim = SimBAI()
+        self.comm = serial.Serial(self.sim.port, timeout=0.2)
+        self.reader = BAI_frame.FrameReader(self.comm)
+
+    def tearDown(self):
+        self.comm.close()
+        self.sim.stop()
+
+    def send(self, data):
+        os.write(self.sim.master, data)
+
+    def test_frame(self):
+        self.send(START_STR + 'A123' + STOP_STR)
+        self.assertEqual(self.reader.read_int('A'), 123)
+        self.assertEqual(self.reader.resync_count, 0)
+
+    def test_garbage(self):
+        self.send('\xff\xfe junk' + START_STR + 'A42' + STOP_STR)
+        self.assertEqual(self.reader.read_payload('A'), '42')
+        self.assertTrue(self.reader.resync_count > 0)
+
+    def test_cut_short_frame(self):
+        # Frame cut off by the start of the next one
+        self.send(START_STR + 'A99' + START_STR + 'A7' + STOP_STR)
+        self.assertEqual(self.reader.read_int('A'), 7)
+
+    def test_split_frame(self):
+        self.send(START_STR[:1])
+        self.send(START_STR[1:] + 'A1')
+        self.send('5' + STOP_STR + START_STR + 'A16' + STOP_STR)
+        self.assertEqual(self.reader.read_int('A'), 15)
+        self.assertEqual(self.reader.read_int('A'), 16)
+
+    def test_other_address(self):
+        self.send(START_STR + 'B1' + STOP_STR + START_STR + 'A2' + STOP_STR)
+        self.assertEqual(self.reader.read_int('A'), 2)
+
+    def test_timeout(self):
+        self.send(START_STR + 'A1')
+        self.assertRaises(IOError, self.reader.read_int, 'A', 0.1)
+
+    def test_drain(self):
+        self.send(START_STR + 'A1' + STOP_STR + START_STR + 'A2' + STOP_STR)
+        self.assertEqual(self.reader.drain(0.05, nframe=2), 2)
+        self.send(START_STR + 'A3' + STOP_STR)
+        self.assertEqual(self.reader.read_int('A'), 3)
+
+class TestPipelinedRead(unittest.TestCase):
+
+    def setUp(self):
+        self.sim = SimBAI()
+        self.sim.start()
+        self.dev = BAI(port=self.sim.port)
+
+    def tearDown(self):
+        self.dev.close()
+        self.sim.stop()
+
+    def test_read_params(self):
+        self.sim.ram['KP'] = 1234
+        self.sim.ram['KI'] = 56
+        param_list = ['KP', 'KI', 'baud rate', 'unit address']
+        self.dev.pipeline_depth = 3
+        val_list = self.dev.read_params(param_list, refresh=True)
+        self.assertEqual(val_list, [1234, 56, 9600, 'A'])
+
+    def test_late_replies(self):
+        # A bad reply stops the read with the replies to the commands
+        # after it still arriving. They must not be taken as the
+        # replies to the next read.
+        self.sim.ram['KP'] = 1234
+        self.sim.ram['KPOS'] = 999
+        self.sim.ram['KI'] = 'bad'
+        self.sim.cmd_latency = 0.02
+        self.dev.pipeline_depth = 4
+        self.assertRaises(ValueError, self.dev.read_params, ['KI', 'KP', 'KPOS', 'KPOS'])
+        self.assertEqual(self.dev.read_param('KPOS'), 999)
+
+    def test_drain_timeout(self):
+        # Reads time out with replies still to come
+        self.sim.ram['KP'] = 1234
+        self.sim.cmd_latency = 0.1
+        self.dev.comm.setTimeout(0.05)
+        self.assertRaises(IOError, self.dev.read_params, ['KI', 'KI'])
+        self.sim.cmd_latency = 0.0
+        self.dev.comm.setTimeout(0.5)
+        self.assertEqual(self.dev.read_param('KP'), 1234)
+
+    def test_single_reply_timeout(self):
+        # Late position reply must not be taken as the reply to the
+        # reads which follow
+        self.sim.ram['KP'] = 1111
+        self.sim.position = 5
+        self.sim.cmd_latency = 0.1
+        self.dev.comm.setTimeout(0.05)
+        self.assertRaises(IOError, self.dev.get_position, strict=True)
+        self.sim.cmd_latency = 0.0
+        self.dev.comm.setTimeout(0.5)
+        self.assertEqual(self.dev.read_param('KP'), 1111)
+        self.assertEqual(self.dev.get_position(strict=True), 5)
+
+if __name__ == '__main__':
+    unittest.main()
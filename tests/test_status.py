@@ -0,0 +1,59 @@
+"""
+Tests of the StatusMonitor against the SimBAI virtual drive.
+
+usage: python -m unittest discover tests
+"""
+import os
+import StringIO
+import sys
+import time
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from BAI import BAI
+from BAI.BAI_sim import SimBAI
+from BAI.BAI_status import StatusMonitor
+
+class TestStatusMonitor(unittest.TestCase):
+
+    def setUp(self):
+        self.sim = SimBAI()
+        self.sim.start()
+        self.dev = BAI(port=self.sim.port)
+        self.monitor = StatusMonitor(self.dev)
+        self.stderr = sys.stderr
+        sys.stderr = StringIO.StringIO()
+
+    def tearDown(self):
+        sys.stderr = self.stderr
+        self.monitor.stop()
+        self.dev.close()
+        self.sim.stop()
+
+    def test_callback_error(self):
+        # A failing callback doesn't stop the others or the polling
+        event_list = []
+        def bad_func(name, val, old_val):
+            raise RuntimeError, 'callback failed'
+        def func(name, val, old_val):
+            event_list.append((name, val, old_val))
+        self.monitor.subscribe(bad_func, ['axis fault'])
+        self.monitor.subscribe(func, ['axis fault'])
+        self.monitor.start(period=0.01)
+        self.sim.status = 1<<4
+        for i in range(100):
+            if event_list:
+                break
+            time.sleep(0.01)
+        self.sim.status = 0
+        for i in range(100):
+            if len(event_list) == 2:
+                break
+            time.sleep(0.01)
+        self.assertEqual(event_list, [('axis fault', True, False), ('axis fault', False, True)])
+        self.assertEqual(self.monitor.callback_errors, 2)
+        self.assertTrue(self.monitor.thread.isAlive())
+        self.assertTrue('callback failed' in sys.stderr.getvalue())
+
+if __name__ == '__main__':
+    unittest.main()
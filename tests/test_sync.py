@@ -0,0 +1,70 @@
+"""
+Tests of the diff based parameter file sync against the SimBAI virtual
+drive.
+
+usage: python -m unittest discover tests
+"""
+import os
+import shutil
+import sys
+import tempfile
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from BAI import BAI
+from BAI import BAI_data
+from BAI.BAI_sim import SimBAI
+
+class TestSyncFromFile(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.mkdtemp()
+        self.filename = os.path.join(self.tmp_dir, 'params.txt')
+        self.sim = SimBAI()
+        self.sim.start()
+        self.dev = BAI(port=self.sim.port)
+        self.dev.param_to_file(self.filename)
+
+    def tearDown(self):
+        self.dev.close()
+        self.sim.stop()
+        shutil.rmtree(self.tmp_dir)
+
+    def sync(self):
+        """
+        Sync from file, returns names of parameters written and number
+        of commands the drive received
+        """
+        count = self.sim.cmd_count
+        baudrate_changed, written, skipped = self.dev.sync_from_file(self.filename)
+        return [x[1] for x in written], self.sim.cmd_count - count
+
+    def test_changed_only(self):
+        self.sim.ram['KP'] = 1
+        self.sim.ram['KI'] = 2
+        written, ncmd = self.sync()
+        self.assertEqual(sorted(written), ['KI', 'KP'])
+        self.assertEqual(ncmd, len(BAI_data.PARAM_LIST) + 2)
+        self.assertEqual(self.sim.ram['KP'], BAI_data.PARAM_DICT['KP']['default'])
+        self.assertEqual(self.sim.ram['KI'], BAI_data.PARAM_DICT['KI']['default'])
+        self.assertEqual(self.sync(), ([], len(BAI_data.PARAM_LIST)))
+
+    def test_stale_shadow(self):
+        # Drive changed behind the shadow copy's back
+        self.dev.enable_shadow()
+        self.dev.read_param('KP')
+        self.sim.ram['KP'] = 1
+        written, ncmd = self.sync()
+        self.assertEqual(written, ['KP'])
+        self.assertEqual(self.sim.ram['KP'], BAI_data.PARAM_DICT['KP']['default'])
+
+    def test_bad_file(self):
+        fid = open(self.filename, 'a')
+        fid.write('bad line\n')
+        fid.close()
+        count = self.sim.cmd_count
+        self.assertRaises(ValueError, self.dev.sync_from_file, self.filename)
+        self.assertEqual(self.sim.cmd_count, count)
+
+if __name__ == '__main__':
+    unittest.main()